@@ -0,0 +1,219 @@
+import re
+
+# Rough size of a token in English prose and JSON; close enough to budget prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+# A unit is clipped to the space left only when at least this many tokens of it still fit
+MIN_CLIP_TOKENS = 40
+# Share of a pair's budget kept for the user's profile when both profiles are over it
+USER_SHARE = 0.4
+
+WORD = re.compile(r"[a-z][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+POSTED_AGO = re.compile(r"(\d+)\s*(mo|yr|y|w|d|h|m)\b")
+DAYS_PER_UNIT = {"m": 0, "h": 1 / 24, "d": 1, "w": 7, "mo": 30, "y": 365, "yr": 365}
+# Words that appear in most profiles and say nothing about common ground
+STOPWORDS = {
+    "and", "the", "for", "with", "from", "into", "that", "this", "our", "your", "their", "about", "at", "in", "of",
+    "on", "to", "a", "an", "as", "by", "or", "is", "are", "was", "were", "be", "been", "has", "have", "had", "it",
+    "its", "we", "i", "my", "me", "you", "he", "she", "they", "team", "teams", "work", "worked", "working",
+    "experience", "years", "year", "present", "company", "role", "new", "also", "more", "using", "used", "posted",
+    "reposted", "commented", "post", "like", "all", "over", "more", "most", "very", "who",
+}
+
+
+def estimate_tokens(value):
+    """Approximate prompt tokens of an input; crewai interpolates dict and list inputs with str()."""
+    return len(value if isinstance(value, str) else str(value)) // CHARS_PER_TOKEN + 1
+
+
+def _words(text):
+    return set(WORD.findall((text or "").lower())) - STOPWORDS
+
+
+def _entries(profile, key):
+    value = profile.get(key)
+    return [entry for entry in value if isinstance(entry, dict)] if isinstance(value, list) else []
+
+
+def _text(value):
+    return value if isinstance(value, str) else ""
+
+
+def profile_terms(profile):
+    """The words of a profile a connection vector could build on: headline, skills, roles, companies, schools."""
+    parts = [_text(profile.get(key)) for key in ("headline", "about", "interests", "other")]
+    strengths = profile.get("strengths")
+    if isinstance(strengths, list):
+        parts += [_text(strength) for strength in strengths]
+    for entry in _entries(profile, "experiences"):
+        parts += [_text(entry.get("title")), _text(entry.get("company"))]
+    for entry in _entries(profile, "education"):
+        parts += [_text(entry.get("institution")), _text(entry.get("field_of_study")), _text(entry.get("degree"))]
+    return _words(" ".join(parts))
+
+
+def profile_organizations(profile):
+    """Companies and schools of a profile, lowercased, for spotting shared experiences."""
+    names = {_text(entry.get("company")) for entry in _entries(profile, "experiences")}
+    names |= {_text(entry.get("institution")) for entry in _entries(profile, "education")}
+    return {name.strip().lower() for name in names if name.strip()}
+
+
+def _relevance(text, terms):
+    """Overlap with the other profile's terms, normalized so long texts do not win on length alone."""
+    words = _words(text)
+    return len(words & terms) / (1 + len(words)) ** 0.5 if words and terms else 0.0
+
+
+def _activity_recency(activity, index):
+    match = POSTED_AGO.search(_text(activity.get("posted_ago")).lower())
+    if match is None:
+        # Activities are listed newest first
+        return 1 / (1 + index)
+    days = int(match.group(1)) * DAYS_PER_UNIT[match.group(2)]
+    return 1 / (1 + days / 30)
+
+
+def _experience_recency(experience, index):
+    # Experiences are listed newest first; a current role is as recent as it gets
+    return 1.0 if "present" in _text(experience.get("duration")).lower() else 1 / (1 + index)
+
+
+def clip_text(text, tokens):
+    """Cut `text` to about `tokens` tokens, at a word boundary."""
+    limit = max(tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + " ..."
+
+
+class _Unit:
+    """A trimmable piece of a profile: an about sentence, an experience description or an activity."""
+
+    def __init__(self, kind, index, text, score, overhead):
+        self.kind = kind
+        self.index = index
+        self.text = text
+        self.score = score
+        self.overhead = overhead  # characters the unit adds to the profile besides its quoted text
+
+    @property
+    def chars(self):
+        return len(repr(self.text)) + self.overhead
+
+    def clipped(self, tokens):
+        return _Unit(self.kind, self.index, clip_text(self.text, tokens), self.score, self.overhead)
+
+
+def _units(profile, other):
+    terms = profile_terms(other) if other else set()
+    organizations = profile_organizations(other) if other else set()
+    units = []
+    for index, sentence in enumerate(s for s in SENTENCE_END.split(_text(profile.get("about"))) if s.strip()):
+        # The first sentences of an about section are usually the summary
+        units.append(_Unit("about", index, sentence, 0.5 / (1 + index / 4) + _relevance(sentence, terms), -1))
+    for index, experience in enumerate(_entries(profile, "experiences")):
+        description = _text(experience.get("description"))
+        if not description:
+            continue
+        shared = _text(experience.get("company")).strip().lower() in organizations
+        score = _experience_recency(experience, index) + 2 * _relevance(description, terms) + (1.0 if shared else 0.0)
+        # Replaces the None left in the skeleton
+        units.append(_Unit("experience", index, description, score, -len("None")))
+    for index, activity in enumerate(_entries(profile, "activities")):
+        content = _text(activity.get("content"))
+        mentions = any(name in content.lower() for name in organizations)
+        score = _activity_recency(activity, index) + 2 * _relevance(content, terms) + (0.5 if mentions else 0.0)
+        units.append(_Unit("activity", index, content, score, len(str({**activity, "content": ""})) - 2 + len(", ")))
+    return units
+
+
+def _assemble(profile, kept):
+    """The profile with only the kept units, in their original order."""
+    result = dict(profile)
+    about = sorted((unit for unit in kept if unit.kind == "about"), key=lambda unit: unit.index)
+    if _text(profile.get("about")):
+        result["about"] = " ".join(unit.text for unit in about) or None
+    descriptions = {unit.index: unit.text for unit in kept if unit.kind == "experience"}
+    if "experiences" in profile:
+        result["experiences"] = [
+            {**experience, "description": descriptions.get(index)} if isinstance(experience, dict) else experience
+            for index, experience in enumerate(profile["experiences"])
+        ]
+    activities = {unit.index: unit.text for unit in kept if unit.kind == "activity"}
+    if "activities" in profile:
+        result["activities"] = [
+            {**activity, "content": activities[index]}
+            for index, activity in enumerate(_entries(profile, "activities"))
+            if index in activities
+        ]
+    return result
+
+
+def _fit_skeleton(profile, budget):
+    """
+    Trim what is left when the profile without about, descriptions and activities
+    is still over budget: older roles first, then the longest text fields.
+    """
+    skeleton = dict(profile)
+    experiences = _entries(skeleton, "experiences")
+    while experiences and estimate_tokens(skeleton) > budget:
+        experiences = experiences[:-1]
+        skeleton["experiences"] = experiences
+    texts = sorted((key for key, value in skeleton.items() if isinstance(value, str)), key=lambda key: -len(skeleton[key]))
+    for key in texts:
+        overflow = estimate_tokens(skeleton) - budget
+        if overflow <= 0:
+            break
+        # One token more for the ' ...' that marks the cut
+        skeleton[key] = clip_text(skeleton[key], max(estimate_tokens(skeleton[key]) - overflow - 1, MIN_CLIP_TOKENS))
+    return skeleton
+
+
+def budget_profile(profile, budget, other=None):
+    """
+    Fit a profile into `budget` estimated tokens. The about sentences, experience
+    descriptions and activities are ranked by recency and by relevance to `other`
+    (the profile on the other side of the message, if any); the highest ranked
+    are kept whole, the next one is clipped to the space left, and the rest are
+    dropped. Names, headlines, roles, schools, interests and strengths are always
+    kept unless they alone are over budget.
+    """
+    if not isinstance(profile, dict) or estimate_tokens(profile) <= budget:
+        return profile
+    units = _units(profile, other)
+    skeleton = _assemble(profile, [])
+    if estimate_tokens(skeleton) > budget:
+        return _fit_skeleton(skeleton, budget)
+
+    # Greedy by rank on a running character count, then checked on the assembled profile
+    limit = budget * CHARS_PER_TOKEN - 1
+    used = len(str(skeleton))
+    kept = []
+    for unit in sorted(units, key=lambda unit: -unit.score):
+        if used + unit.chars <= limit:
+            kept.append(unit)
+            used += unit.chars
+            continue
+        room = (limit - used - unit.overhead - len("'' ...")) // CHARS_PER_TOKEN
+        if room >= MIN_CLIP_TOKENS:
+            clipped = unit.clipped(room)
+            kept.append(clipped)
+            used += clipped.chars
+    result = _assemble(profile, kept)
+    while kept and estimate_tokens(result) > budget:
+        kept.remove(min(kept, key=lambda unit: unit.score))
+        result = _assemble(profile, kept)
+    return result
+
+
+def budget_pair(user_data, target_data, budget):
+    """
+    Fit both profiles of a strategist or fast-mode prompt into `budget`, each
+    ranked against the other. The user's profile gets USER_SHARE of the budget,
+    or more when the target needs less; the target gets whatever is left.
+    """
+    user_budget = max(int(budget * USER_SHARE), budget - estimate_tokens(target_data))
+    user_trimmed = budget_profile(user_data, user_budget, other=target_data)
+    target_trimmed = budget_profile(target_data, budget - estimate_tokens(user_trimmed), other=user_data)
+    return user_trimmed, target_trimmed
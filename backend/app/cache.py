@@ -0,0 +1,163 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def content_key(text: str) -> str:
+    """Content address of a (normalized) document."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class _DiskTier:
+    """SQLite store that survives restarts, evicting the least recently used rows past max_bytes."""
+
+    def __init__(self, path, ttl_seconds, max_bytes, namespace):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            now = time.time()
+            if now - created > self.ttl_seconds:
+                self._db.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE cache SET accessed = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self._db.commit()
+            return value
+
+    def set(self, key, value):
+        """Store a value and return the number of rows evicted to stay under max_bytes."""
+        size = len(value.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, value, size, now, now),
+            )
+            self._db.execute(
+                "DELETE FROM cache WHERE namespace = ? AND created < ?",
+                (self.namespace, now - self.ttl_seconds),
+            )
+            evicted = 0
+            (total,) = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            while total > self.max_bytes:
+                row = self._db.execute(
+                    "SELECT key, size FROM cache WHERE namespace = ? AND key != ? ORDER BY accessed LIMIT 1",
+                    (self.namespace, key),
+                ).fetchone()
+                if row is None:
+                    break
+                self._db.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, row[0]))
+                total -= row[1]
+                evicted += 1
+            self._db.commit()
+            return evicted
+
+
+class JSONCache:
+    """
+    Two-tier cache for JSON-serializable results: an in-process LRU with TTL and a
+    byte budget, optionally backed by a SQLite file so entries survive restarts.
+    Safe to share between request handlers running on different threads.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl_seconds=6 * 3600,
+                 path: Optional[str] = None, disk_max_bytes=256 * 1024 * 1024, namespace="default"):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (value, serialized size, expiry)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(path, ttl_seconds, disk_max_bytes, namespace) if path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _store(self, key, value, size):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires = entry
+                if time.monotonic() < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+        if self._disk is not None:
+            serialized = self._disk.get(key)
+            if serialized is not None:
+                value = json.loads(serialized)
+                with self._lock:
+                    self._store(key, value, len(serialized))
+                    self.disk_hits += 1
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        serialized = json.dumps(value)
+        with self._lock:
+            self._store(key, value, len(serialized))
+        if self._disk is not None:
+            evicted = self._disk.set(key, serialized)
+            with self._lock:
+                self.evictions += evicted
+
+    def clear(self):
+        """Drop the in-process entries; the disk tier is left untouched."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from crewai import Crew
+
+from cache import content_key
+
+
+class LLMClientRegistry:
+    """
+    Keeps one LLM client per (API key, temperature, streaming) so every request of
+    a user goes through the same provider SDK client and reuses its keep-alive
+    HTTP connection pool, instead of building a client (and opening new
+    connections) per request. Clients unused for `idle_seconds` are dropped, and
+    at most `max_clients` are kept, least recently used first out.
+
+    Keys are stored hashed; the client objects are safe to share between the
+    crew worker threads.
+    """
+
+    def __init__(self, factory, max_clients=256, idle_seconds=15 * 60):
+        self.factory = factory  # factory(api_key, temperature, stream) -> LLM
+        self.max_clients = max_clients
+        self.idle_seconds = idle_seconds
+        self._clients = OrderedDict()  # (key hash, temperature, stream) -> (client, last used)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def get(self, api_key, temperature, stream=False):
+        key = (content_key(api_key), temperature, stream)
+        now = time.monotonic()
+        client = self._reuse(key, now)
+        if client is not None:
+            return client
+        # Built outside the lock; two racing requests may both build one, the last one is kept
+        client = self.factory(api_key, temperature, stream)
+        with self._lock:
+            self._clients[key] = (client, now)
+            self._clients.move_to_end(key)
+            self.created += 1
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self.evicted += 1
+        return client
+
+    async def get_async(self, api_key, temperature, stream=False):
+        """
+        get() for the event loop: a kept client is returned right away, a new one is
+        built in a worker thread, since building a client takes tens of milliseconds
+        and would hold up every other request on the loop.
+        """
+        client = self._reuse((content_key(api_key), temperature, stream), time.monotonic())
+        if client is not None:
+            return client
+        return await asyncio.to_thread(self.get, api_key, temperature, stream)
+
+    def _reuse(self, key, now):
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(key)
+            if entry is None:
+                return None
+            self._clients[key] = (entry[0], now)
+            self._clients.move_to_end(key)
+            self.reused += 1
+            return entry[0]
+
+    def _evict_idle(self, now):
+        while self._clients:
+            key, (_, last_used) = next(iter(self._clients.items()))
+            if now - last_used <= self.idle_seconds:
+                return
+            del self._clients[key]
+            self.evicted += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+            }
+
+
+class CrewTemplate:
+    """
+    A single-agent crew whose agent and task are built once, at startup. Each run
+    gets its own copy bound to the caller's LLM client, so concurrent runs never
+    share mutable crew state and nothing global is touched.
+    """
+
+    def __init__(self, agent_factory, task_factory, placeholder_llm):
+        agent = agent_factory(placeholder_llm)
+        self._crew = Crew(
+            agents=[agent],
+            tasks=[task_factory(agent)],
+            verbose=False
+        )
+
+    def bind(self, llm, verbose=False):
+        """Copy the crew for one run; `verbose` is applied per run, so it can be switched without a restart."""
+        crew = self._crew.copy()
+        for agent in crew.agents:
+            agent.llm = llm
+            agent.verbose = verbose
+        return crew
@@ -0,0 +1,72 @@
+import os
+
+
+# The model every agent uses; LLM_BASE_URL points it at another endpoint (e.g. a local stand-in server)
+LLM_MODEL = os.environ.get("LLM_MODEL", "gemini/gemini-2.5-flash-lite")
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL") or None
+
+# Default /generate pipeline: 'crew' (parser, strategist and writer) or 'fast' (one combined call)
+GENERATION_MODE = os.environ.get("GENERATION_MODE", "crew")
+
+# Cache of parsed target profiles (in-process tier)
+PROFILE_CACHE_SIZE = int(os.environ.get("PROFILE_CACHE_SIZE", "256"))
+PROFILE_CACHE_MAX_BYTES = int(os.environ.get("PROFILE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PROFILE_CACHE_TTL = int(os.environ.get("PROFILE_CACHE_TTL", str(6 * 3600)))
+
+# Reduced target pages by the SHA-256 of their HTML, so repeat requests can send the hash instead of the page
+PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", "512"))
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("PAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", str(6 * 3600)))
+
+# Prefetch jobs: finished jobs kept, bytes of results they may hold, and seconds a finished job is kept
+PREFETCH_MAX_JOBS = int(os.environ.get("PREFETCH_MAX_JOBS", "256"))
+PREFETCH_MAX_BYTES = int(os.environ.get("PREFETCH_MAX_BYTES", str(32 * 1024 * 1024)))
+PREFETCH_JOB_TTL = int(os.environ.get("PREFETCH_JOB_TTL", str(10 * 60)))
+
+# Largest request body accepted once decompressed (gzip or zstd Content-Encoding)
+REQUEST_BODY_MAX_BYTES = int(os.environ.get("REQUEST_BODY_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Cache of engagement briefs, shared by every regeneration for the same pair of profiles
+BRIEF_CACHE_SIZE = int(os.environ.get("BRIEF_CACHE_SIZE", "1024"))
+BRIEF_CACHE_TTL = int(os.environ.get("BRIEF_CACHE_TTL", str(24 * 3600)))
+
+# SQLite file for the on-disk cache tier; leave unset to keep caches in memory only
+CACHE_PATH = os.environ.get("CACHE_PATH") or None
+CACHE_DISK_MAX_BYTES = int(os.environ.get("CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Crew execution: concurrent pipelines, pipelines per API key, and jobs allowed to wait in all and per API key
+CREW_MAX_WORKERS = int(os.environ.get("CREW_MAX_WORKERS", "8"))
+CREW_MAX_PER_KEY = int(os.environ.get("CREW_MAX_PER_KEY", "2"))
+CREW_MAX_QUEUE = int(os.environ.get("CREW_MAX_QUEUE", "32"))
+CREW_MAX_QUEUE_PER_KEY = int(os.environ.get("CREW_MAX_QUEUE_PER_KEY", "8"))
+
+# Batch generation: targets per request, and targets processed at once per request
+BATCH_MAX_TARGETS = int(os.environ.get("BATCH_MAX_TARGETS", "100"))
+BATCH_MAX_PARALLELISM = int(os.environ.get("BATCH_MAX_PARALLELISM", "4"))
+
+# Multi-variant generation: drafts per request, and rewrites of a draft that breaks its length limit
+MAX_VARIANTS = int(os.environ.get("MAX_VARIANTS", "6"))
+VARIANT_MAX_RETRIES = int(os.environ.get("VARIANT_MAX_RETRIES", "2"))
+
+# LLM clients kept for reuse across requests, and seconds an unused client is kept
+LLM_CLIENT_MAX = int(os.environ.get("LLM_CLIENT_MAX", "256"))
+LLM_CLIENT_IDLE_TTL = int(os.environ.get("LLM_CLIENT_IDLE_TTL", str(15 * 60)))
+
+# Verbose agent and task logging; it prints every prompt and answer, so it is off unless enabled.
+# This is the value at startup; PUT /admin/verbose switches it while the server runs
+CREW_VERBOSE = os.environ.get("CREW_VERBOSE", "false").lower() in ("1", "true", "yes")
+
+# Bearer token for the /admin endpoints; they are disabled when it is empty
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Targeted follow-up requests for the fields a JSON answer is missing, per stage run
+JSON_REPAIR_MAX_ATTEMPTS = int(os.environ.get("JSON_REPAIR_MAX_ATTEMPTS", "1"))
+
+# Estimated prompt tokens the profile data of each stage may take; longer profiles are ranked and trimmed to fit
+PROMPT_TOKEN_BUDGETS = {
+    "synthesis": int(os.environ.get("SYNTHESIS_TOKEN_BUDGET", "3000")),
+    "connection_analysis": int(os.environ.get("STRATEGIST_TOKEN_BUDGET", "6000")),
+    "fast": int(os.environ.get("FAST_TOKEN_BUDGET", "6000")),
+}
+# Scale of the budget by message length, for the stages that know it (the brief is shared by every length)
+LENGTH_BUDGET_FACTORS = {"connection request": 0.5, "short": 0.75, "medium": 1.0, "long": 1.25}
@@ -1,76 +1,106 @@
+import asyncio
 import json
-import re
-import os
+import secrets
+import time
 
-from fastapi import APIRouter, HTTPException, Header
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Header, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional
 
-from crewai import LLM, Agent, Task, Crew
+from crewai import LLM, Agent, Task
+
+from models import (
+    LinkedInProfile,
+    ProfileInsights,
+    EngagementBrief,
+    FastGenerationResult,
+    GenerateMessageRequest,
+    MessageVariant,
+    RewriteMessageRequest,
+    BatchGenerateRequest,
+    PrefetchRequest,
+    VerboseSetting,
+)
+import config
+from cache import JSONCache, content_key
+from clients import CrewTemplate, LLMClientRegistry
+from executor import CrewExecutor, QueueFullError
+from jobs import JobRegistry
+from metrics import (
+    EXECUTOR_JOBS,
+    FULL_RERUNS_AVOIDED,
+    INPUT_HTML_BYTES,
+    JSON_FAILURES,
+    PREFETCH_REUSED,
+    PROMPT_TOKENS_TRIMMED,
+    QUEUE_WAIT_SECONDS,
+    RECOVERY_OUTCOMES,
+    RETRIES,
+    collect_request_spans,
+    logger,
+    render as render_metrics,
+    server_timing,
+    stage_span,
+)
+from streaming import sse_event, stream_tokens_to
+from reducer import ReducedProfile, compact_profile_text, reduce_profile_html
+from extractor import MIN_EXTRACTION_CONFIDENCE, extract_profile
+from recovery import field_schema, greedy_json, recover_json, validate_fields
+from budget import budget_pair, budget_profile, estimate_tokens
 
 
 # Global model name configuration
-MODEL_NAME = "gemini/gemini-2.5-flash-lite"
-
-# Define the structure for a single experience
-class Experience(BaseModel):
-    title: Optional[str] = Field(description="The job title.")
-    company: Optional[str] = Field(description="The company name.")
-    employment_type: Optional[str] = Field(description="e.g., 'Part-time', 'Internship'")
-    duration: Optional[str] = Field(description="The full duration string.")
-    description: Optional[str] = Field(description="The detailed description of the role.")
-
-# Define the structure for a single education entry
-class Education(BaseModel):
-    institution: Optional[str] = Field(description="The name of the school or university.")
-    degree: Optional[str] = Field(default=None, description="The degree name.")
-    field_of_study: Optional[str] = Field(default=None, description="The field of study.")
-    duration: Optional[str] = Field(default=None, description="The years of attendance.")
-    grade: Optional[str] = Field(default=None, description="The grade mentioned.")
-
-# Define the structure for a single activity
-class Activity(BaseModel):
-    """A single recent activity/post on LinkedIn which the user has engaged with for example posted, commented, etc."""
-    type: Optional[str] = Field(description="The type of activity, e.g., 'reposted this'.")
-    posted_ago: Optional[str] = Field(description="The time elapsed since posting.")
-    content: Optional[str] = Field(description="The full text content of the post.")
-
-# Define the main, top-level JSON structure
-class LinkedInProfile(BaseModel):
-    name: str = Field(description="The user's full name.")
-    headline: Optional[str] = Field(description="The professional headline.")
-    about: Optional[str] = Field(description="The complete text from the 'About' section.")
-    experiences: List[Experience] = Field(default=[], description="A list of all job experiences.")
-    education: List[Education] = Field(default=[], description="A list of all educational entries.")
-    activities: List[Activity] = Field(default=[], description="A list of ALL recent activities.")
-    interests: str = Field(description="A synthesized paragraph about professional interests.")
-    strengths: List[str] = Field(description="A list of key professional strengths.")
-    other: Optional[str] = Field(default=None, description="Any other relevant information like certifications or projects etc.")
-
-# Define the structure for connection vectors
-class ConnectionVector(BaseModel):
-    """A single, actionable reason for professional engagement."""
-    rank: int = Field(description="The rank of this vector's impact, from 1 (strongest).")
-    type: str = Field(description="The category of the vector (e.g., 'Timely Hook', 'Value Proposition').")
-    confidence: str = Field(description="Confidence level of this vector's impact ('High', 'Medium', or 'Low').")
-    detail: str = Field(description="The specific detail of the connection point.")
-    actionable_opener: str = Field(description="A compelling, ready-to-use opening line for a message that leverages this vector and reflects the confidence level.")
-
-# Define the structure for the engagement brief
-class EngagementBrief(BaseModel):
-    """An actionable brief containing ranked connection vectors and seniority analysis."""
-    seniority_dynamic: str = Field(description="Describes the seniority relationship (e.g., 'Peer to Peer', 'Junior to Senior', 'Senior to Junior').")
-    connection_vectors: List[ConnectionVector]
-
-# Define the structure for message generation request
-class GenerateMessageRequest(BaseModel):
-    user_data: dict = Field(description="The user's LinkedIn profile data")
-    target_html: str = Field(description="The HTML content of the target profile")
-    tone: str = Field(description="The desired tone for the message (e.g., 'professional', 'casual', 'friendly')")
-    length: str = Field(description="The desired length of the message (e.g., 'short', 'medium', 'long')")
-    call_to_action: str = Field(description="The desired call to action")
-    extra_instruction: Optional[str] = Field(default="", description="Any additional instructions for message generation")
+MODEL_NAME = config.LLM_MODEL
+
+# LinkedIn's limit for the note of a connection request
+CONNECTION_REQUEST_LIMIT = 200
+
+# Cache of parsed target profiles, keyed by the hash of the reduced profile page
+target_profile_cache = JSONCache(
+    max_entries=config.PROFILE_CACHE_SIZE,
+    max_bytes=config.PROFILE_CACHE_MAX_BYTES,
+    ttl_seconds=config.PROFILE_CACHE_TTL,
+    path=config.CACHE_PATH,
+    disk_max_bytes=config.CACHE_DISK_MAX_BYTES,
+    namespace="target_profile",
+)
+
+# Reduced target pages, keyed by the SHA-256 of the page HTML, so a repeat /generate can send the hash only
+target_page_cache = JSONCache(
+    max_entries=config.PAGE_CACHE_SIZE,
+    max_bytes=config.PAGE_CACHE_MAX_BYTES,
+    ttl_seconds=config.PAGE_CACHE_TTL,
+    path=config.CACHE_PATH,
+    disk_max_bytes=config.CACHE_DISK_MAX_BYTES,
+    namespace="target_page",
+)
 
+# Worker pool for the blocking crew runs, shared by all endpoints
+crew_executor = CrewExecutor(
+    max_workers=config.CREW_MAX_WORKERS,
+    max_queue=config.CREW_MAX_QUEUE,
+    max_per_key=config.CREW_MAX_PER_KEY,
+    max_queue_per_key=config.CREW_MAX_QUEUE_PER_KEY,
+    on_queue_wait=QUEUE_WAIT_SECONDS.observe,
+)
+EXECUTOR_JOBS.labels("running").set_function(lambda: crew_executor.stats()["running"])
+EXECUTOR_JOBS.labels("queued").set_function(lambda: crew_executor.stats()["queued"])
+
+# Target parses started by /prefetch, single-flight per target profile key
+prefetch_jobs = JobRegistry(
+    max_jobs=config.PREFETCH_MAX_JOBS,
+    max_bytes=config.PREFETCH_MAX_BYTES,
+    ttl_seconds=config.PREFETCH_JOB_TTL,
+)
+
+# Cache of engagement briefs, keyed by the user profile and target profile hashes
+engagement_brief_cache = JSONCache(
+    max_entries=config.BRIEF_CACHE_SIZE,
+    ttl_seconds=config.BRIEF_CACHE_TTL,
+    path=config.CACHE_PATH,
+    disk_max_bytes=config.CACHE_DISK_MAX_BYTES,
+    namespace="engagement_brief",
+)
 
 # Define a template for any agent that MUST output JSON
 JSON_SYSTEM_TEMPLATE = """
@@ -87,7 +117,7 @@ Your goal is: {goal}
 JSON_PROMPT_TEMPLATE = """
 Current Task: {input}
 
-Analyze the provided LinkedIn profile HTML and extract the structured information.
+Analyze the provided LinkedIn profile document and extract the structured information.
 
 Begin! Output ONLY the JSON object, nothing else.
 """
@@ -108,13 +138,13 @@ def create_linkedin_profile_processor(llm):
         ready for immediate use.""",
         system_template=JSON_SYSTEM_TEMPLATE,
         prompt_template=JSON_PROMPT_TEMPLATE,
-        verbose=True,
+        verbose=config.CREW_VERBOSE,
         allow_delegation=False,
         use_system_prompt=True,
         llm=llm
     )
 PARSER_TASK_PROMPT ="""
-Fully analyze the provided LinkedIn profile HTML. Extract all key data points including name, headline, about, ALL experiences, ALL education entries, and ALL recent activities.
+Fully analyze the provided LinkedIn profile. It has been reduced from the page HTML to its visible text, grouped under '## Section' headings (Intro, About, Experience, Education, Activity, ...); list entries start with '- ', and nested roles under the same company are indented. The first lines of the Intro section are the name and the headline. Extract all key data points including name, headline, about, ALL experiences, ALL education entries, and ALL recent activities.
 
 Synthesize a summary of the user's professional interests as a concise paragraph that summarizes the user's professional passions and add it to the interests section and a list of their key strengths based on the extracted data.
 
@@ -126,33 +156,63 @@ Structure all of this information into a JSON object that strictly follows the p
 - Do NOT wrap the JSON in markdown backticks (```json).
 - Your entire response MUST start with `{{` and end with `}}`.
 
-HTML Content to Analyze:
-```html
+Profile Content to Analyze:
+```text
 {file_content}
 ```
 """
 
+# The schema goes in the task text instead of output_json: crewai re-runs the whole call when the
+# answer is not valid JSON, while recover_output keeps what is usable and asks only for the rest
+def schema_instructions(model):
+    return f"\nIt must follow this JSON schema:\n{json.dumps(model.model_json_schema())}\n"
+
 # Helper functions to create tasks
 def create_process_user_profile_task(agent):
     return Task(
         description=PARSER_TASK_PROMPT.format(file_content='{user_html}'),
         expected_output="""
             A single, raw, valid JSON object. The entire response must start with '{' and end with '}'. No other text or formatting is allowed.
-        """,
+        """ + schema_instructions(LinkedInProfile),
         agent=agent,
-        output_json=LinkedInProfile,
-        verbose=True,
+        verbose=config.CREW_VERBOSE,
         async_execution=False
     )
 
 def create_process_target_profile_task(agent):
     return Task(
         description=PARSER_TASK_PROMPT.format(file_content='{target_html}'),
-        expected_output="A single, valid JSON object containing the user's complete profile information, matching the schema of the LinkedInProfile model.",
+        expected_output="A single, valid JSON object containing the user's complete profile information, matching the schema of the LinkedInProfile model." + schema_instructions(LinkedInProfile),
         agent=agent,
-        output_json=LinkedInProfile,
-        verbose=True,
-        async_execution=True
+        verbose=config.CREW_VERBOSE,
+        async_execution=False
+    )
+
+SYNTHESIS_TASK_PROMPT = """
+The structured data below has already been extracted from a LinkedIn profile.
+
+Synthesize a summary of the person's professional interests as a concise paragraph that summarizes their professional passions, and a list of their key strengths based on the data.
+
+Structure this into a JSON object with exactly two keys, 'interests' and 'strengths', that strictly follows the provided schema.
+
+**CRITICAL OUTPUT INSTRUCTIONS:**
+- Your FINAL and ONLY output must be the raw JSON object.
+- Do NOT include any introductory text, reasoning, explanations, or concluding remarks.
+- Do NOT wrap the JSON in markdown backticks (```json).
+
+Profile Data:
+```json
+{profile_data}
+```
+"""
+
+def create_synthesize_profile_task(agent):
+    return Task(
+        description=SYNTHESIS_TASK_PROMPT,
+        expected_output="A single, valid JSON object with the 'interests' paragraph and the 'strengths' list, matching the schema of the ProfileInsights model." + schema_instructions(ProfileInsights),
+        agent=agent,
+        verbose=config.CREW_VERBOSE,
+        async_execution=False
     )
 
 
@@ -168,16 +228,16 @@ def create_engagement_strategist(llm):
             "identify the single most compelling hook that will grab a busy professional's attention. You value the time "
             "of the people who read your analysis, so your output is always a concise, prioritized, and actionable brief."
         ),
-        verbose=True,
+        verbose=config.CREW_VERBOSE,
         allow_delegation=False,
         llm=llm
     )
-def create_connection_analysis_task(agent, context_task):
+def create_connection_analysis_task(agent):
     return Task(
         description="""
         As a Strategic Engagement Analyst, your mission is to produce an actionable brief on the most potent connection vectors between a 'user' and a 'target'. 
         user_data: `{user_data}`
-        target_data: (from context of target parsing task)
+        target_data: `{target_data}`
 
         Your thinking process must be as follows:
         1.  **Assess Seniority Dynamic:** First, compare the user's and target's headlines and experience levels. Determine their professional relationship and set the 'seniority_dynamic' to one of: 'Peer to Peer', 'Junior to Senior', or 'Senior to Junior'.
@@ -212,10 +272,8 @@ def create_connection_analysis_task(agent, context_task):
             }
           ]
         }
-        """,
-        agent=agent,
-        output_json=EngagementBrief,
-        context=[context_task]
+        """ + schema_instructions(EngagementBrief),
+        agent=agent
     )
 
 
@@ -231,18 +289,19 @@ def create_message_writer_agent(llm):
             "You understand the subtlety of tone, the importance of brevity, and how to weave a call to action into a message "
             "so naturally that it feels like an invitation. You never waste a word and your work is flawless."
         ),
-        verbose=True,
+        verbose=config.CREW_VERBOSE,
         allow_delegation=False,
         llm=llm
     )
-def create_write_message_task(agent, context_tasks):
+def create_write_message_task(agent):
     return Task(
         description="""
         As an Executive Ghostwriter, your mission is to write the final outreach message.
 
         **1. Analyze Your Inputs:**
         You will receive the following inputs to guide your writing:
-        - **Strategic Brief:** The full context from the previous task, including the 'seniority_dynamic' and the ranked 'connection_vectors' with their 'actionable_openers'.
+        - **Strategic Brief:** `{brief}`, including the 'seniority_dynamic' and the ranked 'connection_vectors' with their 'actionable_openers'.
+        - **Recipient Name:** `{target_name}`
         - **Tone:** `{tone}`
         - **Length Constraint:** `{length}`
         - **Call to Action (CTA):** `{call_to_action}`
@@ -268,10 +327,662 @@ def create_write_message_task(agent, context_tasks):
 
         """,
         expected_output="A single block of text representing the final, ready-to-send message, adhering to all constraints.",
+        agent=agent
+    )
+
+
+
+# Helper function to create the single-call agent used in fast mode
+def create_fast_outreach_agent(llm):
+    return Agent(
+        role="Strategic Outreach Ghostwriter",
+        goal="In a single pass, find the most impactful connection vectors between two professional profiles and write the final outreach message that leverages the strongest one, returned together as one JSON object.",
+        backstory=(
+            "You are both a master of professional networking and a sought-after ghostwriter for executives. "
+            "You read two career profiles, spot the single most compelling hook, and turn it into a concise, "
+            "natural message that respects the seniority dynamic and every constraint you are given."
+        ),
+        verbose=config.CREW_VERBOSE,
+        allow_delegation=False,
+        llm=llm
+    )
+def create_fast_generation_task(agent):
+    return Task(
+        description="""
+        Produce an engagement brief AND the final outreach message from a 'user' to a 'target' in one pass.
+        user_data: `{user_data}`
+        target_data: `{target_data}`
+
+        **1. Engagement Brief:**
+        a. Compare headlines and experience levels and set 'seniority_dynamic' to one of: 'Peer to Peer', 'Junior to Senior', or 'Senior to Junior'.
+        b. Find connection vectors across Timely Hooks (recent activity), Value Propositions (user's skills matching target's needs), Shared Experiences (companies/universities) and Common Ground (skills/interests). For a 'Junior to Senior' dynamic, favour Value Propositions.
+        c. Keep the top 3 (ALWAYS at least one), ranked from 1 (strongest), each with a 'confidence' of 'High', 'Medium' or 'Low' and an 'actionable_opener' whose directness matches that confidence and the seniority dynamic.
+
+        **2. Message:**
+        - **Recipient Name:** `{target_name}`
+        - **Tone:** `{tone}`
+        - **Length Constraint:** `{length}` ('long' approx. 150-200 words, 'medium' approx. 75-100 words, 'short' approx. 25-50 words; 'Connection Request' MUST be under 200 characters, and this limit applies ONLY to 'Connection Request').
+        - **Call to Action (CTA):** `{call_to_action}`
+        - **Extra Instructions:** `{extra_instructions}`
+        Build the message on the rank 1 'actionable_opener', respect the seniority dynamic, embed the CTA naturally towards the end, and apply the tone and extra instructions. It must sound natural, human and personal, never like a template, and contain no placeholders.
+        """,
+        expected_output="""
+        A JSON object that strictly adheres to the 'FastGenerationResult' schema: a 'brief' following the 'EngagementBrief' schema, and the final 'message' as a single block of text.
+        """ + schema_instructions(FastGenerationResult),
+        agent=agent
+    )
+
+
+
+REPAIR_TASK_PROMPT = """
+An earlier answer to this task was incomplete: the fields {fields} were missing, cut off or invalid. The rest of that answer is already usable and must NOT be repeated.
+
+Source material:
+```text
+{source}
+```
+
+Usable part of the earlier answer, for context:
+```json
+{partial}
+```
+
+Produce ONLY the fields {fields}, as a JSON object with exactly those keys that strictly follows this schema:
+```json
+{schema}
+```
+
+**CRITICAL OUTPUT INSTRUCTIONS:**
+- Your FINAL and ONLY output must be the raw JSON object.
+- Do NOT include any introductory text, reasoning, explanations, or concluding remarks.
+- Do NOT wrap the JSON in markdown backticks (```json).
+"""
+
+# Helper function to create the follow-up task that asks only for the fields an answer got wrong
+def create_repair_task(agent):
+    return Task(
+        description=REPAIR_TASK_PROMPT,
+        expected_output="A single, valid JSON object containing only the requested fields.",
         agent=agent,
-        context=context_tasks  # Receives the 'EngagementBrief' from the previous task
+        verbose=config.CREW_VERBOSE,
+        async_execution=False
+    )
+
+
+
+# Helper function to create an LLM client; only called by the client registry and at startup
+def create_llm(api_key, temperature, stream=False):
+    return LLM(
+        model=MODEL_NAME,
+        temperature=temperature,
+        api_key=api_key,
+        base_url=config.LLM_BASE_URL,
+        stream=stream
     )
 
+# LLM clients shared by all requests made with the same API key
+llm_clients = LLMClientRegistry(
+    create_llm,
+    max_clients=config.LLM_CLIENT_MAX,
+    idle_seconds=config.LLM_CLIENT_IDLE_TTL,
+)
+
+# Agents and tasks are built once here; every run binds a copy to the caller's client
+template_llm = create_llm("unbound", 0.0)
+crew_templates = {
+    "user_profile": CrewTemplate(create_linkedin_profile_processor, create_process_user_profile_task, template_llm),
+    "target_profile": CrewTemplate(create_linkedin_profile_processor, create_process_target_profile_task, template_llm),
+    "synthesis": CrewTemplate(create_linkedin_profile_processor, create_synthesize_profile_task, template_llm),
+    "connection_analysis": CrewTemplate(create_engagement_strategist, create_connection_analysis_task, template_llm),
+    "message": CrewTemplate(create_message_writer_agent, create_write_message_task, template_llm),
+    "fast": CrewTemplate(create_fast_outreach_agent, create_fast_generation_task, template_llm),
+    "profile_repair": CrewTemplate(create_linkedin_profile_processor, create_repair_task, template_llm),
+    "brief_repair": CrewTemplate(create_engagement_strategist, create_repair_task, template_llm),
+}
+
+# The template that repairs the answer of each stage
+REPAIR_STAGES = {
+    "synthesis": "profile_repair",
+    "user_profile": "profile_repair",
+    "target_profile": "profile_repair",
+    "connection_analysis": "brief_repair",
+    "fast": "brief_repair",
+}
+
+
+
+# Verbose agent logging, read on every crew run so /admin/verbose applies to the next one
+crew_logging = {"verbose": config.CREW_VERBOSE}
+
+# Helper function to run a copy of a stage's crew template as a timed span
+def run_crew(stage, llm, inputs):
+    with stage_span(stage):
+        return crew_templates[stage].bind(llm, verbose=crew_logging["verbose"]).kickoff(inputs=inputs)
+
+# Helper function to recover a stage's JSON answer, re-asking only for the fields it got wrong
+def recover_output(raw, stage, model, llm, source):
+    """
+    The answer is parsed tolerantly (code fences, surrounding text, truncation) and
+    validated against `model`. Fields still missing or invalid are requested with
+    a targeted follow-up, up to JSON_REPAIR_MAX_ATTEMPTS times, instead of failing
+    the request and having the user re-run the whole stage.
+    """
+    try:
+        greedy_json(raw)
+        well_formed = True
+    except ValueError:
+        JSON_FAILURES.labels(stage).inc()
+        well_formed = False
+    try:
+        data, lost = recover_json(raw)
+    except ValueError:
+        # No '{...}' at all: every field is missing, and the follow-up asks for them all
+        data, lost = {}, list(model.model_fields)
+    data, invalid = validate_fields(data, model)
+    missing = sorted(set(invalid) | set(lost))
+
+    attempts = 0
+    while missing and attempts < config.JSON_REPAIR_MAX_ATTEMPTS:
+        attempts += 1
+        RETRIES.labels(stage, "invalid_fields").inc()
+        print(f"The {stage} answer is missing or has invalid fields {missing}, asking for those only")
+        result = run_crew(REPAIR_STAGES[stage], llm, {
+            "fields": ", ".join(missing),
+            "schema": json.dumps(field_schema(model, missing)),
+            "partial": json.dumps(data),
+            "source": source
+        })
+        try:
+            patch, _ = recover_json(result.raw)
+        except ValueError:
+            JSON_FAILURES.labels(REPAIR_STAGES[stage]).inc()
+            continue
+        data, missing = validate_fields({**data, **{key: patch[key] for key in missing if key in patch}}, model)
+
+    if missing:
+        RECOVERY_OUTCOMES.labels(stage, "failed").inc()
+        raise ValueError(f"The model's answer is missing or has invalid fields: {', '.join(missing)}")
+    if attempts:
+        outcome = "followup"
+    elif well_formed and not invalid:
+        outcome = "clean"
+    else:
+        outcome = "repaired"
+    RECOVERY_OUTCOMES.labels(stage, outcome).inc()
+    if outcome != "clean":
+        FULL_RERUNS_AVOIDED.labels(stage).inc()
+    return data
+
+# Helper function to fit the profile data of a stage's prompt into the stage's token budget
+def budget_profiles(stage, profile, other=None, length=None):
+    """
+    Trims `profile` (and `other`, when the stage sees both profiles) to the budget
+    of `stage`, scaled by the message length for the stages that know it. Returns
+    the trimmed profiles; the originals are left untouched for the caches.
+    """
+    factor = config.LENGTH_BUDGET_FACTORS.get((length or "").strip().lower(), 1.0)
+    budget = int(config.PROMPT_TOKEN_BUDGETS[stage] * factor)
+    with stage_span("budget"):
+        before = estimate_tokens(profile) + (estimate_tokens(other) if other is not None else 0)
+        if other is None:
+            profile = budget_profile(profile, budget)
+        else:
+            profile, other = budget_pair(profile, other, budget)
+        after = estimate_tokens(profile) + (estimate_tokens(other) if other is not None else 0)
+    if after < before:
+        PROMPT_TOKENS_TRIMMED.labels(stage).inc(before - after)
+        logger.debug("Trimmed the profile data of the %s prompt from about %d to %d tokens (budget %d)", stage, before, after, budget)
+    return profile, other
+
+# Helper function to turn profile HTML into LinkedInProfile JSON
+def parse_profile_html(html, llm, target=False, reduced=None):
+    """
+    The structured fields are extracted without the LLM; the agent only synthesizes
+    'interests' and 'strengths'. Pages the extractor cannot read with enough
+    confidence fall back to the full agent parse of the compact document.
+    """
+    reduced = reduced or reduce_profile_html(html)
+    document = compact_profile_text(html, reduced)
+    with stage_span("extract"):
+        extraction = extract_profile(reduced)
+
+    if extraction.confidence >= MIN_EXTRACTION_CONFIDENCE:
+        logger.debug("Extracted profile fields without the LLM (confidence %s)", extraction.confidence)
+        profile, _ = budget_profiles("synthesis", extraction.profile)
+        profile_data = json.dumps(profile)
+        result = run_crew("synthesis", llm, {"profile_data": profile_data})
+        return {**extraction.profile, **recover_output(result.raw, "synthesis", ProfileInsights, llm, profile_data)}
+
+    logger.debug("Extraction confidence %s is too low (missing %s), using the full LLM parse", extraction.confidence, extraction.missing)
+    if target:
+        stage, inputs = "target_profile", {"target_html": document}
+    else:
+        stage, inputs = "user_profile", {"user_html": document}
+    result = run_crew(stage, llm, inputs)
+    return recover_output(result.raw, stage, LinkedInProfile, llm, document)
+
+# Helper function to reduce an uploaded target page and keep it for requests that reference it by hash
+def reduce_target_page(html):
+    """
+    The page is stored under the SHA-256 of its HTML, which is what clients send
+    as target_hash. Pages the reducer finds nothing in are not stored, so they are
+    always uploaded and go through the raw HTML fallback.
+    """
+    reduced = reduce_profile_html(html)
+    if reduced.text:
+        target_page_cache.set(content_key(html), reduced.model_dump())
+    return reduced
+
+# Helper function to look up a target page uploaded earlier; None when it is unknown or expired
+def stored_target_page(target_hash):
+    entry = target_page_cache.get(target_hash)
+    return ReducedProfile.model_validate(entry) if entry is not None else None
+
+# Helper function to compute the key a target profile is cached and prefetched under
+def target_profile_key(html, reduced):
+    """
+    The hash of the reduced page text, so markup that changes without changing
+    the profile (ids, classes, tracking attributes) keeps the key; the raw HTML
+    when the reducer found nothing.
+    """
+    return content_key(reduced.text or html)
+
+# Helper function to get the target profile JSON, parsing it only on a cache miss
+def get_target_profile(html, llm, reduced=None):
+    """Return the target profile's cache key and its LinkedInProfile JSON."""
+    reduced = reduced or reduce_target_page(html)
+    target_key = target_profile_key(html, reduced)
+    target_data = target_profile_cache.get(target_key)
+    if target_data is not None:
+        print("Target profile cache hit, skipping the parser")
+        return target_key, target_data
+    target_data = parse_profile_html(html, llm, target=True, reduced=reduced)
+    target_profile_cache.set(target_key, target_data)
+    return target_key, target_data
+
+# Helper function to parse a target ahead of /generate; blocking, so it runs on the crew executor
+def prefetch_target_profile(html, llm, reduced=None):
+    """The parsed profile lands in the target profile cache, where /generate picks it up."""
+    _, target_data = get_target_profile(html, llm, reduced=reduced)
+    return target_data
+
+# Helper function to wait for a prefetch of the request's target, so /generate does not parse it twice
+async def await_prefetch(job):
+    """A failed job is ignored; the pipeline then parses the target itself."""
+    if job is None:
+        return
+    PREFETCH_REUSED.labels(job.status).inc()
+    if job.status == "running":
+        print("Target is being prefetched, waiting for its parse")
+        try:
+            # Shielded: a client that goes away must not cancel the prefetch for the next request
+            await asyncio.shield(job.future)
+        except Exception as e:
+            print(f"Prefetch failed, parsing the target again: {str(e)}")
+
+# Helper function to get the engagement brief, running the strategist only on a cache miss
+def get_engagement_brief(user_data, target_key, target_data, llm, user_key=None):
+    """
+    The brief only depends on the two profiles, so it is shared by every tone,
+    length, CTA and extra instruction the user tries for the same target.
+    Returns the brief id (its cache key) and the cached entry.
+    """
+    user_key = user_key or content_key(json.dumps(user_data, sort_keys=True))
+    brief_id = user_key + ":" + target_key
+    entry = engagement_brief_cache.get(brief_id)
+    if entry is not None:
+        print("Engagement brief cache hit, skipping the strategist")
+        return brief_id, entry
+
+    user_prompt_data, target_prompt_data = budget_profiles("connection_analysis", user_data, target_data)
+    result = run_crew("connection_analysis", llm, {
+        "user_data": user_prompt_data,
+        "target_data": target_prompt_data
+    })
+    source = json.dumps({"user_data": user_prompt_data, "target_data": target_prompt_data})
+    entry = {
+        "brief": recover_output(result.raw, "connection_analysis", EngagementBrief, llm, source),
+        "target_name": target_data.get("name") or ""
+    }
+    engagement_brief_cache.set(brief_id, entry)
+    return brief_id, entry
+
+# Helper function to write the message from a brief
+def write_message(entry, tone, length, call_to_action, extra_instruction, llm):
+    result = run_crew("message", llm, {
+        "brief": json.dumps(entry["brief"]),
+        "target_name": entry["target_name"],
+        "tone": tone,
+        "length": length,
+        "call_to_action": call_to_action,
+        "extra_instructions": extra_instruction or ""
+    })
+    return result.raw
+
+# Helper function to run the first two /generate stages
+def prepare_engagement_brief(request, llm, on_event=None, user_key=None, reduced=None):
+    """
+    Parse the target and build the brief, reusing cached results.
+    on_event(event, data) is called as each stage finishes, for streaming clients;
+    `reduced` is the stored page of a request that sent only the target hash.
+    """
+    emit = on_event or (lambda event, data: None)
+    target_key, target_data = get_target_profile(request.target_html, llm, reduced=reduced)
+    emit("target_parsed", {
+        "name": target_data.get("name"),
+        "headline": target_data.get("headline")
+    })
+    brief_id, entry = get_engagement_brief(request.user_data, target_key, target_data, llm, user_key=user_key)
+    emit("brief_ready", {"brief_id": brief_id, **entry["brief"]})
+    return brief_id, entry
+
+# Helper function to run the full /generate pipeline; blocking, so it runs on the crew executor
+def run_generate_pipeline(request, llm, on_event=None, writer_llm=None, user_key=None, reduced=None):
+    """Only the writer always runs; the target profile and the brief come from the caches when possible."""
+    brief_id, entry = prepare_engagement_brief(request, llm, on_event=on_event, user_key=user_key, reduced=reduced)
+    generated_message = write_message(
+        entry,
+        request.tone,
+        request.length,
+        request.call_to_action,
+        request.extra_instruction,
+        writer_llm or llm
+    )
+    return brief_id, generated_message
+
+# Helper function to run /generate in fast mode: the brief and the message come from one LLM call
+def run_fast_pipeline(request, llm, on_event=None, user_key=None, reduced=None):
+    """
+    The target is not run through the synthesis or parser agents: a cached profile
+    is used when there is one, otherwise the extracted fields (or, when extraction
+    fails, the compact page text) go straight into the combined call. The brief is
+    cached like in the crew pipeline, so /rewrite works on fast-mode results too.
+    """
+    emit = on_event or (lambda event, data: None)
+    reduced = reduced or reduce_target_page(request.target_html)
+    target_key = target_profile_key(request.target_html, reduced)
+    target_data = target_profile_cache.get(target_key)
+    if target_data is None:
+        with stage_span("extract"):
+            extraction = extract_profile(reduced)
+        if extraction.confidence >= MIN_EXTRACTION_CONFIDENCE:
+            target_data = extraction.profile
+        else:
+            target_data = {"profile_text": compact_profile_text(request.target_html, reduced)}
+    emit("target_parsed", {
+        "name": target_data.get("name"),
+        "headline": target_data.get("headline")
+    })
+
+    user_prompt_data, target_prompt_data = budget_profiles("fast", request.user_data, target_data, length=request.length)
+    result = run_crew("fast", llm, {
+        "user_data": user_prompt_data,
+        "target_data": target_prompt_data,
+        "target_name": target_data.get("name") or "",
+        "tone": request.tone,
+        "length": request.length,
+        "call_to_action": request.call_to_action,
+        "extra_instructions": request.extra_instruction or ""
+    })
+    source = json.dumps({
+        "user_data": user_prompt_data,
+        "target_data": target_prompt_data,
+        "message": {
+            "tone": request.tone,
+            "length": request.length,
+            "call_to_action": request.call_to_action,
+            "extra_instructions": request.extra_instruction or ""
+        }
+    })
+    output = recover_output(result.raw, "fast", FastGenerationResult, llm, source)
+
+    user_key = user_key or content_key(json.dumps(request.user_data, sort_keys=True))
+    brief_id = user_key + ":" + target_key
+    entry = {
+        "brief": output["brief"],
+        "target_name": target_data.get("name") or ""
+    }
+    engagement_brief_cache.set(brief_id, entry)
+    emit("brief_ready", {"brief_id": brief_id, **entry["brief"]})
+    return brief_id, output["message"]
+
+# Helper function to write one draft variant, rewriting it while it breaks the Connection Request limit
+def write_variant(entry, variant, llm):
+    message = write_message(
+        entry,
+        variant.tone,
+        variant.length,
+        variant.call_to_action,
+        variant.extra_instruction,
+        llm
+    )
+    attempts = 1
+    limited = variant.length.strip().lower() == "connection request"
+    while limited and len(message) > CONNECTION_REQUEST_LIMIT and attempts <= config.VARIANT_MAX_RETRIES:
+        print(f"Connection Request draft is {len(message)} characters, rewriting it")
+        RETRIES.labels("message", "length_limit").inc()
+        retry_instruction = (
+            f"{variant.extra_instruction or ''} Your previous draft was {len(message)} characters long. "
+            f"The message MUST be under {CONNECTION_REQUEST_LIMIT} characters, including spaces."
+        ).strip()
+        message = write_message(
+            entry,
+            variant.tone,
+            variant.length,
+            variant.call_to_action,
+            retry_instruction,
+            llm
+        )
+        attempts += 1
+    return {
+        "tone": variant.tone,
+        "length": variant.length,
+        "generated_message": message,
+        "characters": len(message),
+        "within_limit": not limited or len(message) <= CONNECTION_REQUEST_LIMIT,
+        "attempts": attempts
+    }
+
+# Helper function to write several drafts from one brief
+async def generate_variants(request, api_key, llm, reduced=None):
+    """
+    The target is parsed and the brief is built once; the writer then runs for every
+    variant in parallel on the crew executor. Variants inherit the request's CTA and
+    extra instruction unless they set their own. A failing variant only turns its own
+    draft into an error, like a failing target in /generate_batch; the request fails
+    only when every draft does.
+    """
+    executor_key = content_key(api_key)
+    brief_id, entry = await crew_executor.run(executor_key, prepare_engagement_brief, request, llm, reduced=reduced)
+    variants = [
+        MessageVariant(
+            tone=variant.tone,
+            length=variant.length,
+            call_to_action=variant.call_to_action if variant.call_to_action is not None else request.call_to_action,
+            extra_instruction=variant.extra_instruction if variant.extra_instruction is not None else request.extra_instruction
+        )
+        for variant in request.variants
+    ]
+    errors = []
+
+    async def run_variant(variant):
+        while True:
+            try:
+                draft = await crew_executor.run(executor_key, write_variant, entry, variant, llm)
+                return {**draft, "status": "success"}
+            except QueueFullError as e:
+                # Other traffic filled the queue; the draft waits its turn instead of failing the others
+                RETRIES.labels("variants", "queue_full").inc()
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                print(f"Error writing the {variant.tone}/{variant.length} draft: {str(e)}")
+                errors.append(e)
+                return {
+                    "tone": variant.tone,
+                    "length": variant.length,
+                    "status": "error",
+                    "detail": f"Failed to generate message: {str(e)}"
+                }
+
+    drafts = await asyncio.gather(*[run_variant(variant) for variant in variants])
+    if len(errors) == len(drafts):
+        raise errors[0]
+    return {
+        "generated_message": next(draft["generated_message"] for draft in drafts if draft["status"] == "success"),
+        "drafts": drafts,
+        "brief_id": brief_id,
+        "status": "partial" if errors else "success"
+    }
+
+# Helper function to run the /generate pipeline as a Server-Sent Events stream
+def start_generate_stream(request, api_key, llm, fast=False, reduced=None):
+    """
+    Emits 'target_parsed' and 'brief_ready' as the stages finish, 'token' events while
+    the writer produces the message, then 'done' with the same body as the JSON
+    response (or 'error'). Queueing happens before the response starts, so a full
+    queue is still reported as a plain 429.
+    """
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def emit(event, data):
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    def streamed_pipeline():
+        if fast:
+            # The message is part of a JSON object in fast mode, so only the stage events are streamed
+            return run_fast_pipeline(request, llm, on_event=emit, reduced=reduced)
+        # Built on the worker thread: building a client would hold up the event loop
+        writer_llm = llm_clients.get(api_key, 0.8, stream=True)
+        with stream_tokens_to(lambda chunk: emit("token", {"text": chunk})):
+            return run_generate_pipeline(request, llm, on_event=emit, writer_llm=writer_llm, reduced=reduced)
+
+    job = crew_executor.submit(content_key(api_key), streamed_pipeline)
+    job.add_done_callback(lambda _: events.put_nowait(None))
+
+    async def event_stream():
+        try:
+            while (item := await events.get()) is not None:
+                yield sse_event(*item)
+            if job.cancelled() or job.exception() is not None:
+                error = "cancelled" if job.cancelled() else str(job.exception())
+                print(f"Error generating message: {error}")
+                yield sse_event("error", {"detail": f"Failed to generate message: {error}"})
+                return
+            brief_id, generated_message = job.result()
+            print("Message generation completed successfully")
+            yield sse_event("done", {
+                "generated_message": generated_message,
+                "brief_id": brief_id,
+                "status": "success"
+            })
+        finally:
+            # Drops the job if the client disconnected before it started
+            job.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Helper function to run a batch of targets concurrently and stream the results as NDJSON
+def start_batch_stream(request, api_key, llm):
+    """
+    Each target runs the regular /generate pipeline; at most `parallelism` of them
+    are queued on the crew executor at once, no more than it runs at once for one
+    API key (CREW_MAX_PER_KEY). Results are streamed one JSON line per
+    target, in completion order, with per-stage timings; a failing target only
+    produces an error line. A final summary line closes the stream.
+    """
+    # The executor runs at most CREW_MAX_PER_KEY pipelines of one key at once; more would only wait in its queue
+    parallelism = min(request.parallelism or config.BATCH_MAX_PARALLELISM, config.BATCH_MAX_PARALLELISM, config.CREW_MAX_PER_KEY)
+    slots = asyncio.Semaphore(parallelism)
+    pipeline = run_fast_pipeline if (request.mode or config.GENERATION_MODE) == "fast" else run_generate_pipeline
+    # The user profile is hashed once for the whole batch
+    user_key = content_key(json.dumps(request.user_data, sort_keys=True))
+
+    async def run_target(index, target):
+        item = GenerateMessageRequest(user_data=request.user_data, **target.model_dump(exclude={"id"}))
+        timing = {}
+        if not target.target_html:
+            return {
+                "index": index,
+                "id": target.id,
+                "status": "error",
+                "detail": "target html must be provided.",
+                "timing": timing
+            }
+        async with slots:
+            started = time.perf_counter()
+
+            def mark_stage(event, data):
+                timing[f"{event}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+            while True:
+                try:
+                    brief_id, generated_message = await crew_executor.run(
+                        content_key(api_key), pipeline, item, llm,
+                        on_event=mark_stage, user_key=user_key
+                    )
+                    break
+                except QueueFullError as e:
+                    # Other traffic filled the queue; the batch waits its turn instead of failing
+                    RETRIES.labels("batch", "queue_full").inc()
+                    await asyncio.sleep(e.retry_after)
+                except Exception as e:
+                    print(f"Error generating message for batch target {index}: {str(e)}")
+                    timing["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    return {
+                        "index": index,
+                        "id": target.id,
+                        "status": "error",
+                        "detail": f"Failed to generate message: {str(e)}",
+                        "timing": timing
+                    }
+            timing["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return {
+            "index": index,
+            "id": target.id,
+            "status": "success",
+            "generated_message": generated_message,
+            "brief_id": brief_id,
+            "timing": timing
+        }
+
+    async def result_stream():
+        started = time.perf_counter()
+        tasks = [asyncio.ensure_future(run_target(index, target)) for index, target in enumerate(request.targets)]
+        succeeded = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                succeeded += result["status"] == "success"
+                yield json.dumps(result) + "\n"
+            print(f"Batch of {len(tasks)} targets completed ({succeeded} succeeded)")
+            yield json.dumps({
+                "summary": {
+                    "targets": len(tasks),
+                    "succeeded": succeeded,
+                    "failed": len(tasks) - succeeded,
+                    "parallelism": parallelism,
+                    "total_ms": round((time.perf_counter() - started) * 1000, 1)
+                }
+            }) + "\n"
+        finally:
+            # Stop the remaining targets if the client disconnected
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+# Helper function to turn a full executor queue into a 429 response
+def too_many_requests(error):
+    return HTTPException(
+        status_code=429,
+        detail="The server is busy. Please try again shortly.",
+        headers={"Retry-After": str(error.retry_after)}
+    )
 
 
 # Create FastAPI router
@@ -279,7 +990,7 @@ router = APIRouter()
 
 # Create a POST endpoint to parse and update the USER's data
 @router.post("/parse_profile", response_model=LinkedInProfile)
-async def parse_linkedin_profile(request: dict, authorization: Optional[str] = Header(None)):
+async def parse_linkedin_profile(request: dict, response: Response, authorization: Optional[str] = Header(None)):
     
     # Extract API key from Authorization header
     api_key = None
@@ -294,46 +1005,32 @@ async def parse_linkedin_profile(request: dict, authorization: Optional[str] = H
     
     if not html_content:
         raise HTTPException(status_code=400, detail="No HTML content provided")
+    INPUT_HTML_BYTES.labels("parse_profile").observe(len(html_content.encode("utf-8")))
     
     try:
-        os.environ["GEMINI_API_KEY"] = api_key
-        # Create the LLM with the provided API key
-        profile_llm = LLM(
-            model=MODEL_NAME,
-            temperature=0.4,
-            api_key=api_key
-        )
-        
-        # Create agent and task with the API key
-        linkedin_profile_processor = create_linkedin_profile_processor(profile_llm)
-        process_user_profile_task = create_process_user_profile_task(linkedin_profile_processor)
+        # The key is passed to the client only; it is never written to the process environment
+        profile_llm = await llm_clients.get_async(api_key, 0.4)
         
-        # Execute the task
-        parse_crew = Crew(
-            agents=[linkedin_profile_processor],
-            tasks=[process_user_profile_task],
-            verbose=False    
-        )
-        result = parse_crew.kickoff(inputs={"user_html": html_content})
+        with collect_request_spans() as spans:
+            profile = await crew_executor.run(content_key(api_key), parse_profile_html, html_content, profile_llm)
+        response.headers["Server-Timing"] = server_timing(spans)
         print("Profile parsing completed successfully")
-        # print("Raw output:", result.raw)
-
-        # Use regex to extract the JSON object from the raw output
-        json_match = re.search(r'\{.*\}', result.raw, re.DOTALL)
-        if not json_match:
-            # If no '{...}' is found at all, the LLM failed completely.
-            raise HTTPException(status_code=500, detail="Failed to find a valid JSON object in the model's response.")
-        json_string = json_match.group(0)
-
-        return json.loads(json_string)
+        return profile
         
+    except QueueFullError as e:
+        raise too_many_requests(e)
     except Exception as e:
         print(f"Error parsing profile: {str(e)}")
         raise HTTPException(status_code=503, detail=f"Failed to parse profile: {str(e)}")
 
 # Create a POST endpoint to generate a message based on profile data
 @router.post("/generate")
-async def generate_message(request: GenerateMessageRequest, authorization: Optional[str] = Header(None)):
+async def generate_message(
+    request: GenerateMessageRequest,
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None)
+):
     print("Generate message request received")
 
     api_key = None
@@ -343,54 +1040,224 @@ async def generate_message(request: GenerateMessageRequest, authorization: Optio
     if not api_key or api_key == "null":
         print("No API key provided")
         raise HTTPException(status_code=401, detail="No API key provided in Authorization header")
-    
-    # TODO: Implement actual message generation logic
-    # For now, just return a placeholder response
 
-    if not request.target_html:
-        raise HTTPException(status_code=400, detail="target html must be provided. Refresh the page and try again.")
+    if request.variants is not None and not 0 < len(request.variants) <= config.MAX_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {config.MAX_VARIANTS} variants can be requested.")
+    mode = request.mode or config.GENERATION_MODE
+    if mode not in ("crew", "fast"):
+        raise HTTPException(status_code=400, detail="mode must be 'crew' or 'fast'.")
+
+    job = prefetch_jobs.get(request.prefetch_job_id) if request.prefetch_job_id else None
+    if request.target_html:
+        INPUT_HTML_BYTES.labels("generate").observe(len(request.target_html.encode("utf-8")))
+        reduced = await asyncio.to_thread(reduce_target_page, request.target_html)
+    elif request.target_hash:
+        # Hash-first upload: the page is only sent again when the server no longer has it
+        reduced = stored_target_page(request.target_hash)
+        if reduced is None:
+            raise HTTPException(status_code=404, detail="Target page not found or expired. Send target_html.")
+    else:
+        # A request that only names its prefetch job targets the page the job parsed
+        reduced = stored_target_page(job.source) if job is not None and job.source else None
+        if reduced is None:
+            raise HTTPException(status_code=400, detail="target html must be provided. Refresh the page and try again.")
+    # The named job is reused only if it parsed this profile, so a stale job id cannot put another
+    # person into the message; otherwise a prefetch of the same profile is found by its key,
+    # whatever markup it came in
+    target_key = target_profile_key(request.target_html, reduced)
+    if job is None or job.key != target_key:
+        job = prefetch_jobs.find(target_key)
+    await await_prefetch(job)
     
     try:
-        # Create the LLM with the provided API key
-        message_llm = LLM(
-            model=MODEL_NAME,
-            temperature=0.8,
-            api_key=api_key
-        )
+        # Reuse the client of the provided API key
+        message_llm = await llm_clients.get_async(api_key, 0.8)
 
-        # Create agents with the API key
-        linkedin_profile_processor = create_linkedin_profile_processor(message_llm)
-        engagement_strategist = create_engagement_strategist(message_llm)
-        message_writer_agent = create_message_writer_agent(message_llm)
-        
-        # Create tasks
-        process_target_profile_task = create_process_target_profile_task(linkedin_profile_processor)
-        connection_analysis_task = create_connection_analysis_task(engagement_strategist, process_target_profile_task)
-        write_message_task = create_write_message_task(message_writer_agent, [process_target_profile_task, connection_analysis_task])
-
-        # Execute the tasks in sequence
-        message_crew = Crew(
-            agents=[linkedin_profile_processor, engagement_strategist, message_writer_agent],
-            tasks=[process_target_profile_task, connection_analysis_task, write_message_task],
-            verbose=False    
-        )
+        # Several drafts from one brief are returned together as a single JSON response
+        if request.variants:
+            with collect_request_spans() as spans:
+                result = await generate_variants(request, api_key, message_llm, reduced=reduced)
+            response.headers["Server-Timing"] = server_timing(spans)
+            print(f"Generated {len(result['drafts'])} message variants successfully")
+            return result
 
-        result = message_crew.kickoff(inputs={
-            "user_data": request.user_data,
-            "target_html": request.target_html,
-            "tone": request.tone,
-            "length": request.length,
-            "call_to_action": request.call_to_action,
-            "extra_instructions": request.extra_instruction or ""
-        })
+        # Clients that accept an event stream get stage progress and the message tokens as they come
+        if "text/event-stream" in (accept or ""):
+            return start_generate_stream(request, api_key, message_llm, fast=mode == "fast", reduced=reduced)
+
+        pipeline = run_fast_pipeline if mode == "fast" else run_generate_pipeline
+        with collect_request_spans() as spans:
+            brief_id, generated_message = await crew_executor.run(
+                content_key(api_key), pipeline, request, message_llm, reduced=reduced
+            )
+        response.headers["Server-Timing"] = server_timing(spans)
 
         print("Message generation completed successfully")
 
+    except QueueFullError as e:
+        raise too_many_requests(e)
     except Exception as e:
         print(f"Error generating message: {str(e)}")
         raise HTTPException(status_code=503, detail=f"Failed to generate message: {str(e)}")
 
     return {
-        "generated_message": result.raw,
+        "generated_message": generated_message,
+        "brief_id": brief_id,
+        "status": "success"
+    }
+
+# Create a POST endpoint to generate messages for many targets with one user profile
+@router.post("/generate_batch")
+async def generate_batch(request: BatchGenerateRequest, authorization: Optional[str] = Header(None)):
+    print(f"Batch generate request received for {len(request.targets)} targets")
+
+    api_key = None
+    if authorization and authorization.startswith("Bearer "):
+        api_key = authorization[7:]  # Remove "Bearer " prefix
+
+    if not api_key or api_key == "null":
+        raise HTTPException(status_code=401, detail="No API key provided in Authorization header")
+
+    if not request.targets:
+        raise HTTPException(status_code=400, detail="At least one target must be provided.")
+    if len(request.targets) > config.BATCH_MAX_TARGETS:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {config.BATCH_MAX_TARGETS} targets.")
+    if (request.mode or config.GENERATION_MODE) not in ("crew", "fast"):
+        raise HTTPException(status_code=400, detail="mode must be 'crew' or 'fast'.")
+    if request.parallelism is not None and request.parallelism < 1:
+        raise HTTPException(status_code=400, detail="parallelism must be at least 1.")
+    for target in request.targets:
+        INPUT_HTML_BYTES.labels("generate_batch").observe(len(target.target_html.encode("utf-8")))
+
+    message_llm = await llm_clients.get_async(api_key, 0.8)
+    return start_batch_stream(request, api_key, message_llm)
+
+# Create a POST endpoint to rewrite a message from an existing brief with new parameters
+@router.post("/rewrite")
+async def rewrite_message(request: RewriteMessageRequest, response: Response, authorization: Optional[str] = Header(None)):
+    print("Rewrite message request received")
+
+    api_key = None
+    if authorization and authorization.startswith("Bearer "):
+        api_key = authorization[7:]  # Remove "Bearer " prefix
+
+    if not api_key or api_key == "null":
+        raise HTTPException(status_code=401, detail="No API key provided in Authorization header")
+
+    entry = engagement_brief_cache.get(request.brief_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Brief not found or expired. Generate the message again.")
+
+    try:
+        message_llm = await llm_clients.get_async(api_key, 0.8)
+        with collect_request_spans() as spans:
+            generated_message = await crew_executor.run(
+                content_key(api_key),
+                write_message,
+                entry,
+                request.tone,
+                request.length,
+                request.call_to_action,
+                request.extra_instruction,
+                message_llm
+            )
+        response.headers["Server-Timing"] = server_timing(spans)
+        print("Message rewrite completed successfully")
+
+    except QueueFullError as e:
+        raise too_many_requests(e)
+    except Exception as e:
+        print(f"Error rewriting message: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Failed to rewrite message: {str(e)}")
+
+    return {
+        "generated_message": generated_message,
+        "brief_id": request.brief_id,
         "status": "success"
-    }
\ No newline at end of file
+    }
+
+# Create a POST endpoint to start parsing a target before the user asks for the message
+@router.post("/prefetch", status_code=202)
+async def prefetch(request: PrefetchRequest, authorization: Optional[str] = Header(None)):
+    api_key = None
+    if authorization and authorization.startswith("Bearer "):
+        api_key = authorization[7:]  # Remove "Bearer " prefix
+
+    if not api_key or api_key == "null":
+        raise HTTPException(status_code=401, detail="No API key provided in Authorization header")
+
+    if request.target_html:
+        INPUT_HTML_BYTES.labels("prefetch").observe(len(request.target_html.encode("utf-8")))
+        page_hash = content_key(request.target_html)
+        reduced = await asyncio.to_thread(reduce_target_page, request.target_html)
+    elif request.target_hash:
+        page_hash = request.target_hash
+        reduced = stored_target_page(page_hash)
+        if reduced is None:
+            raise HTTPException(status_code=404, detail="Target page not found or expired. Send target_html.")
+    else:
+        raise HTTPException(status_code=400, detail="target html must be provided. Refresh the page and try again.")
+
+    # Single flight: a profile that is being parsed, or was parsed recently, is not parsed again,
+    # keyed like the target profile cache so a re-captured page with the same text finds the job
+    target_key = target_profile_key(request.target_html, reduced)
+    job = prefetch_jobs.find(target_key)
+    if job is None:
+        # The same client /generate parses the target with
+        message_llm = await llm_clients.get_async(api_key, 0.8)
+        try:
+            job = prefetch_jobs.start(target_key, lambda: crew_executor.submit(
+                content_key(api_key), prefetch_target_profile, request.target_html, message_llm, reduced=reduced
+            ), source=page_hash)
+        except QueueFullError as e:
+            raise too_many_requests(e)
+        print("Target prefetch started")
+
+    return {"job_id": job.id, "status": job.status, "target_hash": page_hash}
+
+# Create a GET endpoint to report the status and result of a prefetch job
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, authorization: Optional[str] = Header(None)):
+    if not authorization or not authorization.startswith("Bearer ") or authorization[7:] in ("", "null"):
+        raise HTTPException(status_code=401, detail="No API key provided in Authorization header")
+
+    job = prefetch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job.describe()
+
+# Create a GET endpoint to expose the cache counters
+@router.get("/cache_stats")
+async def cache_stats():
+    return {
+        "target_pages": target_page_cache.stats(),
+        "target_profiles": target_profile_cache.stats(),
+        "engagement_briefs": engagement_brief_cache.stats()
+    }
+
+# Create a GET endpoint for Prometheus to scrape
+@router.get("/metrics")
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# Create a GET endpoint for health checks; it never waits on the crew executor
+@router.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "executor": crew_executor.stats(),
+        "prefetch_jobs": prefetch_jobs.stats(),
+        "llm_clients": llm_clients.stats()
+    }
+
+# Create a PUT endpoint to switch verbose agent logging without a restart
+@router.put("/admin/verbose")
+async def set_verbose(setting: VerboseSetting, authorization: Optional[str] = Header(None)):
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not authorization or not secrets.compare_digest(authorization, f"Bearer {config.ADMIN_TOKEN}"):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    crew_logging["verbose"] = setting.enabled
+    print(f"Verbose agent logging {'enabled' if setting.enabled else 'disabled'}")
+    return crew_logging
@@ -0,0 +1,138 @@
+import asyncio
+import contextvars
+import functools
+import math
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when the executor's wait queue is full; the request should be retried later."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many pending requests, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class CrewExecutor:
+    """
+    Runs blocking crew pipelines on a bounded worker pool so they never stall the
+    event loop. At most `max_workers` pipelines run at once and at most
+    `max_per_key` of them belong to the same API key; waiting jobs are dispatched
+    round-robin across keys, so one heavy user cannot starve the others. A job
+    that can start right away is always accepted; one that has to wait is
+    rejected with QueueFullError once `max_queue_per_key` jobs of its key, or
+    `max_queue` jobs in all, are waiting. So one key cannot fill the queue
+    with jobs its own cap keeps from running and lock the other keys out.
+
+    All bookkeeping happens on the event loop thread; only the pipelines
+    themselves run on the pool, in a copy of the submitter's context.
+    on_queue_wait(seconds) is called as each job leaves the queue.
+    """
+
+    def __init__(self, max_workers=8, max_queue=32, max_per_key=2, max_queue_per_key=8, on_queue_wait=None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_per_key = max_per_key
+        self.max_queue_per_key = max_queue_per_key
+        self.on_queue_wait = on_queue_wait
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew")
+        self._waiting = OrderedDict()  # key -> deque of (future, call, queued at), in round-robin order
+        self._running_per_key = {}
+        self._running = 0
+        self._queued = 0
+        self._avg_duration = 10.0      # moving average of a job's run time, in seconds
+        self.completed = 0
+        self.rejected = 0
+
+    def retry_after(self, key=None):
+        """Seconds until a slot is likely to free up for a new job (of `key`, if given)."""
+        rounds = (self._queued + 1) / max(self.max_workers, 1)
+        if key is not None:
+            rounds = max(rounds, (len(self._waiting.get(key, ())) + 1) / max(self.max_per_key, 1))
+        return max(1, math.ceil(rounds * self._avg_duration))
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) on behalf of `key` and return a future for its result.
+        Raises QueueFullError right away when the job would have to wait and the
+        queue of its key, or the whole queue, is full; cancelling the future
+        before the job starts drops it from the queue.
+        """
+        starts_now = self._running < self.max_workers and self._running_per_key.get(key, 0) < self.max_per_key
+        if not starts_now and (
+            len(self._waiting.get(key, ())) >= self.max_queue_per_key or self._queued >= self.max_queue
+        ):
+            self.rejected += 1
+            raise QueueFullError(self.retry_after(key))
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Like asyncio.to_thread, the job sees the context variables of the caller
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        self._waiting.setdefault(key, deque()).append((future, call, time.monotonic()))
+        self._queued += 1
+        self._dispatch(loop)
+        return future
+
+    async def run(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool on behalf of `key` and return its result."""
+        # If the caller is cancelled (e.g. the client went away), awaiting cancels the future too
+        return await self.submit(key, fn, *args, **kwargs)
+
+    def _dispatch(self, loop):
+        while self._running < self.max_workers:
+            key = next(
+                (key for key in self._waiting if self._running_per_key.get(key, 0) < self.max_per_key),
+                None,
+            )
+            if key is None:
+                return
+            jobs = self._waiting.pop(key)
+            future, call, queued_at = jobs.popleft()
+            if jobs:
+                # Re-append so the next dispatch serves the other keys first
+                self._waiting[key] = jobs
+            self._queued -= 1
+            if future.cancelled():
+                continue
+            self._running += 1
+            self._running_per_key[key] = self._running_per_key.get(key, 0) + 1
+            started_at = time.monotonic()
+            if self.on_queue_wait is not None:
+                self.on_queue_wait(started_at - queued_at)
+            pool_future = loop.run_in_executor(self._pool, call)
+            pool_future.add_done_callback(
+                functools.partial(self._finish, loop, key, future, started_at)
+            )
+
+    def _finish(self, loop, key, future, started_at, pool_future):
+        self._running -= 1
+        self._running_per_key[key] -= 1
+        if not self._running_per_key[key]:
+            del self._running_per_key[key]
+        self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.monotonic() - started_at)
+        self.completed += 1
+        if not future.done():
+            if pool_future.cancelled():
+                future.cancel()
+            elif pool_future.exception() is not None:
+                future.set_exception(pool_future.exception())
+            else:
+                future.set_result(pool_future.result())
+        self._dispatch(loop)
+
+    def stats(self):
+        return {
+            "running": self._running,
+            "queued": self._queued,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "max_queue_per_key": self.max_queue_per_key,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
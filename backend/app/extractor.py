@@ -0,0 +1,261 @@
+import re
+import sys
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from models import Experience, Education, Activity
+from reducer import SECTION_IDS, ReducedProfile, ProfileEntry, reduce_profile_html
+
+
+# Extraction below this confidence falls back to the full LLM parse
+MIN_EXTRACTION_CONFIDENCE = 0.6
+
+EMPLOYMENT_TYPES = {
+    "full-time", "part-time", "self-employed", "freelance", "contract",
+    "internship", "apprenticeship", "seasonal", "volunteer",
+}
+
+MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+# e.g. "Jan 2020 - Present · 4 yrs 2 mos", "2012 - 2017", "Mar 2023"
+DATE_RANGE_RE = re.compile(
+    rf"^(?:{MONTH}\s+)?\d{{4}}(?:\s*[-–]\s*(?:(?:{MONTH}\s+)?\d{{4}}|present))?(?:\s*·.*)?$",
+    re.IGNORECASE,
+)
+# e.g. "Full-time · 5 yrs 3 mos", the caption of a company grouping several roles
+TENURE_RE = re.compile(r"^(?:.*·\s*)?(?:\d+\s+(?:yrs?|mos?)\s*)+$", re.IGNORECASE)
+# e.g. "3w", "2mo • Edited", "1yr"
+POSTED_AGO_RE = re.compile(r"^(\d+\s*(?:s|m|h|d|w|mo|yr|y)s?)\b", re.IGNORECASE)
+ACTIVITY_TYPE_RE = re.compile(r"\b(reposted|commented|posted|liked|shared|celebrates|supports|loves|finds|replied)\b", re.IGNORECASE)
+LOCATION_RE = re.compile(r"(?:,\s*\w|\b(?:remote|on-site|hybrid)\b)", re.IGNORECASE)
+GRADE_RE = re.compile(r"^grade:\s*(.+)$", re.IGNORECASE)
+
+# Sections whose text is kept verbatim in the 'other' field
+OTHER_SECTIONS = [
+    "certifications", "projects", "honors", "publications", "courses", "volunteering", "languages", "skills",
+    "organizations", "patents", "test_scores", "causes",
+]
+
+# Sections the extractor knows what to do with; any other section sends the page to the LLM parse
+KNOWN_SECTIONS = {"intro", *SECTION_IDS.values()}
+
+
+# Define the output of the rule-based extractor
+class ExtractionResult(BaseModel):
+    profile: dict = Field(description="The extracted LinkedInProfile fields, without 'interests' and 'strengths'.")
+    confidence: float = Field(description="Share of the expected fields that were found, from 0 to 1.")
+    missing: List[str] = Field(default=[], description="The expected fields that could not be found.")
+
+
+def _is_date_line(line):
+    return bool(DATE_RANGE_RE.match(line))
+
+def _is_location_line(line):
+    return len(line) <= 60 and bool(LOCATION_RE.search(line)) and "." not in line.rstrip(".")
+
+def _split_company(line):
+    """Split 'Acme · Full-time' into ('Acme', 'Full-time')."""
+    parts = [part.strip() for part in line.split("·")]
+    if len(parts) > 1 and parts[-1].lower() in EMPLOYMENT_TYPES:
+        return " · ".join(parts[:-1]), parts[-1]
+    if parts[0].lower() in EMPLOYMENT_TYPES:
+        return None, parts[0]
+    return line, None
+
+def _description(lines):
+    lines = [line for line in lines if not _is_location_line(line)]
+    return "\n".join(lines) or None
+
+
+def _parse_role(lines, company=None, employment_type=None):
+    """Parse the lines of a single role: title, company line, date range, location, description."""
+    title = lines[0] if lines else None
+    rest = lines[1:]
+    if rest and not _is_date_line(rest[0]):
+        parsed_company, parsed_type = _split_company(rest[0])
+        # Roles grouped under a company only carry the employment type on this line
+        company = company or parsed_company
+        employment_type = parsed_type or employment_type
+        rest = rest[1:]
+    duration = None
+    if rest and _is_date_line(rest[0]):
+        duration = rest[0]
+        rest = rest[1:]
+    return Experience(
+        title=title,
+        company=company,
+        employment_type=employment_type,
+        duration=duration,
+        description=_description(rest),
+    )
+
+
+def _split_nested(entries: List[ProfileEntry]):
+    """Group a flat entry list into (entry, nested entries) pairs, one per entry of the outermost level."""
+    groups = []
+    for entry in entries:
+        if groups and entry.depth > groups[-1][0].depth:
+            groups[-1][1].append(entry)
+        else:
+            groups.append((entry, []))
+    return groups
+
+def _nested_lines(entries: List[ProfileEntry]):
+    return [line for entry in entries for line in entry.lines]
+
+def _looks_like_role(entry: ProfileEntry):
+    # A role shows its date range right below the title, or below the company or employment type line
+    return any(_is_date_line(line) for line in entry.lines[1:3])
+
+
+def _extract_experiences(entries: List[ProfileEntry]) -> List[Experience]:
+    experiences = []
+    for entry, nested in _split_nested(entries):
+        if not entry.lines:
+            continue
+        children = _split_nested(nested)
+        if any(_looks_like_role(child) for child, _ in children):
+            # A company grouping several roles: 'Acme', 'Full-time · 5 yrs', location
+            company, employment_type = _split_company(entry.lines[0])
+            for line in entry.lines[1:]:
+                if TENURE_RE.match(line):
+                    employment_type = employment_type or _split_company(line.split("·")[0].strip())[1]
+            for child, sub_components in children:
+                if _looks_like_role(child):
+                    lines = child.lines + _nested_lines(sub_components)
+                    experiences.append(_parse_role(lines, company=company, employment_type=employment_type))
+        else:
+            # A single role; its nested sub-components hold the description and skills
+            experiences.append(_parse_role(entry.lines + _nested_lines(nested)))
+    return experiences
+
+
+def _extract_education(entries: List[ProfileEntry]) -> List[Education]:
+    education = []
+    for entry, nested in _split_nested(entries):
+        if not entry.lines:
+            continue
+        degree = field_of_study = duration = grade = None
+        # The grade and activities are nested sub-components of the school
+        for line in entry.lines[1:] + _nested_lines(nested):
+            grade_match = GRADE_RE.match(line)
+            if grade_match:
+                grade = grade_match.group(1)
+            elif _is_date_line(line) and duration is None:
+                duration = line
+            elif degree is None and duration is None:
+                degree, _, field_of_study = line.partition(", ")
+                field_of_study = field_of_study or None
+        education.append(Education(
+            institution=entry.lines[0],
+            degree=degree,
+            field_of_study=field_of_study,
+            duration=duration,
+            grade=grade,
+        ))
+    return education
+
+
+def _extract_activities(entries: List[ProfileEntry]) -> List[Activity]:
+    activities = []
+    for entry in entries:
+        if entry.depth or not entry.lines:
+            continue
+        activity_type = posted_ago = None
+        content = []
+        for line in entry.lines:
+            ago_match = POSTED_AGO_RE.match(line)
+            if posted_ago is None and ago_match and len(line) <= 40:
+                posted_ago = ago_match.group(1)
+            elif activity_type is None and not content and len(line) <= 80 and ACTIVITY_TYPE_RE.search(line):
+                activity_type = line
+            else:
+                content.append(line)
+        if not content:
+            continue
+        activities.append(Activity(
+            type=activity_type,
+            posted_ago=posted_ago,
+            content="\n".join(content),
+        ))
+    return activities
+
+
+def _extract_other(reduced: ReducedProfile) -> Optional[str]:
+    parts = []
+    for key in OTHER_SECTIONS:
+        section = reduced.section(key)
+        if section is None:
+            continue
+        items = [" · ".join(entry.lines) for entry in section.entries if entry.lines and not entry.depth]
+        items = items or section.lines
+        if items:
+            parts.append(f"{section.title}: " + "; ".join(items))
+    return "\n".join(parts) or None
+
+
+def extract_profile(reduced: ReducedProfile) -> ExtractionResult:
+    """
+    Fill the structured LinkedInProfile fields directly from the reduced profile,
+    without an LLM call. 'interests' and 'strengths' are left to the synthesis task.
+    """
+    intro = reduced.section("intro")
+    intro_lines = intro.lines if intro else []
+    about = reduced.section("about")
+    experience = reduced.section("experience")
+    education = reduced.section("education")
+    activity = reduced.section("activity")
+
+    profile = {
+        "name": intro_lines[0] if intro_lines else None,
+        "headline": intro_lines[1] if len(intro_lines) > 1 else None,
+        "about": "\n".join(about.lines) if about and about.lines else None,
+        "experiences": [item.model_dump() for item in _extract_experiences(experience.entries)] if experience else [],
+        "education": [item.model_dump() for item in _extract_education(education.entries)] if education else [],
+        "activities": [item.model_dump() for item in _extract_activities(activity.entries)] if activity else [],
+        "other": _extract_other(reduced),
+    }
+
+    # Score the fields every profile page is expected to have, each section the
+    # page shows, and each parsed entry: a section that is there but yields
+    # nothing counts against the extraction as much as one that is missing
+    checks = {
+        "name": bool(profile["name"]),
+        "headline": bool(profile["headline"]),
+        "experiences": bool(profile["experiences"]),
+        "education": bool(profile["education"]),
+    }
+    if about:
+        checks["about"] = bool(profile["about"])
+    if activity:
+        checks["activities"] = bool(profile["activities"])
+    for position, item in enumerate(profile["experiences"]):
+        checks[f"experiences[{position}]"] = bool(item["title"] and item["company"] and item["duration"])
+    for position, item in enumerate(profile["education"]):
+        checks[f"education[{position}]"] = bool(item["institution"])
+    unrecognized = [section.title for section in reduced.sections if section.key not in KNOWN_SECTIONS]
+    for title in unrecognized:
+        checks[f"section:{title}"] = False
+
+    missing = [field for field, found in checks.items() if not found]
+    confidence = (len(checks) - len(missing)) / len(checks)
+    if not profile["name"] or unrecognized:
+        # Without a name the profile cannot be validated, and a section the reducer
+        # could not place (e.g. a translated 'Experience' heading) may hold any of
+        # the fields; either way the page is left to the LLM parse
+        confidence = 0.0
+    return ExtractionResult(profile=profile, confidence=round(confidence, 3), missing=missing)
+
+
+if __name__ == "__main__":
+    # Usage: python extractor.py profile.html [profile.html ...]
+    # Prints the extracted fields, the confidence and the extraction time of each page.
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as file:
+            html = file.read()
+        start = time.perf_counter()
+        result = extract_profile(reduce_profile_html(html))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"== {path}: confidence={result.confidence} missing={result.missing} time={elapsed_ms:.1f}ms")
+        print(result.model_dump_json(indent=2))
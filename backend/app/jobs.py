@@ -0,0 +1,128 @@
+import json
+import secrets
+import time
+from collections import OrderedDict
+
+
+class Job:
+    """A background job: its future while it runs, then its result or error."""
+
+    def __init__(self, job_id, key, future, source=None):
+        self.id = job_id
+        self.key = key
+        self.source = source
+        self.future = future
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.size = 0
+
+    @property
+    def status(self):
+        if self.finished_at is None:
+            return "running"
+        return "failed" if self.error is not None else "done"
+
+    def describe(self):
+        body = {"job_id": self.id, "status": self.status, "target_hash": self.source}
+        if self.status == "done":
+            body["result"] = self.result
+        elif self.status == "failed":
+            body["error"] = self.error
+        return body
+
+
+class JobRegistry:
+    """
+    Single-flight registry of background jobs, keyed by what they compute (e.g.
+    the key of a target profile) and remembering what they were started from
+    (e.g. the hash of the target page): while a job for a key is running or its
+    result is kept, `find` returns it instead of letting a second one start.
+    Finished jobs are kept for `ttl_seconds`, and at most `max_jobs` of them holding
+    `max_bytes` of results, oldest first out; running jobs are bounded by the
+    executor queue that runs them.
+
+    All bookkeeping happens on the event loop thread, like the crew executor's.
+    """
+
+    def __init__(self, max_jobs=256, max_bytes=32 * 1024 * 1024, ttl_seconds=600):
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._jobs = OrderedDict()  # job id -> Job, oldest first
+        self._by_key = {}
+        self._bytes = 0
+        self.started = 0
+        self.reused = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def start(self, key, submit, source=None):
+        """Start a job for `key` from `source` with submit(), which returns its future, and register it."""
+        job = Job(secrets.token_urlsafe(16), key, submit(), source)
+        job.future.add_done_callback(lambda future: self._finish(job))
+        self._jobs[job.id] = job
+        self._by_key[key] = job.id
+        self.started += 1
+        self._evict()
+        return job
+
+    def get(self, job_id):
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def find(self, key):
+        """The running or finished job for `key`; failed jobs are not returned, so they can be retried."""
+        self._expire()
+        job = self._jobs.get(self._by_key.get(key))
+        if job is None or job.status == "failed":
+            return None
+        self.reused += 1
+        return job
+
+    def _finish(self, job):
+        job.finished_at = time.monotonic()
+        if job.future.cancelled():
+            job.error = "cancelled"
+        elif job.future.exception() is not None:
+            job.error = str(job.future.exception())
+        else:
+            job.result = job.future.result()
+            job.size = len(json.dumps(job.result))
+        if job.id in self._jobs:
+            self._bytes += job.size
+            self._evict()
+
+    def _remove(self, job):
+        del self._jobs[job.id]
+        if self._by_key.get(job.key) == job.id:
+            del self._by_key[job.key]
+        self._bytes -= job.size
+
+    def _expire(self):
+        now = time.monotonic()
+        for job in [job for job in self._jobs.values() if job.finished_at and now - job.finished_at > self.ttl_seconds]:
+            self._remove(job)
+            self.expired += 1
+
+    def _evict(self):
+        while len(self._jobs) > self.max_jobs or self._bytes > self.max_bytes:
+            job = next((job for job in self._jobs.values() if job.finished_at is not None), None)
+            if job is None:
+                return
+            self._remove(job)
+            self.evicted += 1
+
+    def stats(self):
+        self._expire()
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "running": statuses.count("running"),
+            "done": statuses.count("done"),
+            "failed": statuses.count("failed"),
+            "bytes": self._bytes,
+            "started": self.started,
+            "reused": self.reused,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
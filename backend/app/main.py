@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from endpoint import router
+import config
+from compression import RequestDecompressionMiddleware
 
 app = FastAPI(title="LinkedIn Customized Message Generator")
 
+# Clients may send gzip (or zstd) request bodies; the profile HTML compresses about tenfold
+app.add_middleware(RequestDecompressionMiddleware, max_bytes=config.REQUEST_BODY_MAX_BYTES)
+
 app.include_router(router)
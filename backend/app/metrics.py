@@ -0,0 +1,133 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+try:
+    from crewai.events import crewai_event_bus, LLMCallCompletedEvent
+except ImportError:
+    try:
+        from crewai.utilities.events import crewai_event_bus, LLMCallCompletedEvent
+    except ImportError:
+        # Older crewai without call events: stage timings are still recorded, token counts are not
+        crewai_event_bus = None
+        LLMCallCompletedEvent = None
+
+
+logger = logging.getLogger("metrics")
+
+STAGE_SECONDS = Histogram(
+    "generator_stage_duration_seconds",
+    "Duration of each pipeline stage (one crew task, or the rule-based extraction)",
+    ["stage", "status"],
+    buckets=(0.005, 0.025, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+LLM_CALLS = Counter("generator_llm_calls_total", "LLM calls made by each stage", ["stage"])
+LLM_TOKENS = Counter("generator_llm_tokens_total", "LLM tokens used by each stage", ["stage", "type"])
+INPUT_HTML_BYTES = Histogram(
+    "generator_input_html_bytes",
+    "Size of the profile HTML received by each endpoint",
+    ["endpoint"],
+    buckets=(10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000),
+)
+REQUEST_BODY_BYTES = Counter(
+    "generator_request_body_bytes_total",
+    "Request body bytes as received ('wire') and after decompression ('decoded'), by Content-Encoding",
+    ["encoding", "form"],
+)
+RETRIES = Counter("generator_retries_total", "Work repeated after a failed or rejected attempt", ["stage", "reason"])
+JSON_FAILURES = Counter("generator_json_extraction_failures_total", "Model responses that were not a well-formed JSON object", ["stage"])
+RECOVERY_OUTCOMES = Counter(
+    "generator_json_recovery_total",
+    "JSON answers by how they were recovered: clean, repaired (without the LLM), followup or failed",
+    ["stage", "outcome"],
+)
+FULL_RERUNS_AVOIDED = Counter(
+    "generator_full_reruns_avoided_total",
+    "Answers recovered by repair or a targeted follow-up that would otherwise have failed the request",
+    ["stage"],
+)
+PROMPT_TOKENS_TRIMMED = Counter(
+    "generator_prompt_tokens_trimmed_total",
+    "Estimated profile tokens cut from each stage's prompt to fit its token budget",
+    ["stage"],
+)
+PREFETCH_REUSED = Counter(
+    "generator_prefetch_reused_total",
+    "/generate requests that reused a prefetch job, by the job's state when the request arrived",
+    ["state"],
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "generator_queue_wait_seconds",
+    "Time a pipeline waited in the crew executor queue before starting",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60),
+)
+EXECUTOR_JOBS = Gauge("generator_executor_jobs", "Crew executor jobs by state", ["state"])
+
+# The stage being run in the current context, used to attribute LLM calls and token usage
+current_stage = ContextVar("current_stage", default=None)
+# Spans of the current request, for its Server-Timing header; None outside a request
+request_spans = ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def stage_span(stage):
+    """Time a pipeline stage and attribute the LLM calls made inside it to `stage`."""
+    token = current_stage.set(stage)
+    started = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        current_stage.reset(token)
+        duration = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage, status).observe(duration)
+        spans = request_spans.get()
+        if spans is not None:
+            spans.append((stage, duration))
+        logger.info("stage=%s status=%s duration_ms=%.1f", stage, status, duration * 1000)
+
+
+@contextmanager
+def collect_request_spans():
+    """Collect the spans of the stages run for this request, including those run on the crew executor."""
+    token = request_spans.set([])
+    try:
+        yield request_spans.get()
+    finally:
+        request_spans.reset(token)
+
+
+def server_timing(spans):
+    """Format spans as a Server-Timing header value."""
+    return ", ".join(f"{stage};dur={duration * 1000:.1f}" for stage, duration in spans)
+
+
+def _usage_value(usage, *names):
+    for name in names:
+        value = usage.get(name)
+        if isinstance(value, (int, float)):
+            return value
+    return 0
+
+
+def _record_llm_call(source, event):
+    stage = current_stage.get() or "unknown"
+    LLM_CALLS.labels(stage).inc()
+    usage = event.usage or {}
+    # OpenAI-style and Gemini-style usage keys
+    LLM_TOKENS.labels(stage, "prompt").inc(_usage_value(usage, "prompt_tokens", "input_tokens", "prompt_token_count"))
+    LLM_TOKENS.labels(stage, "completion").inc(
+        _usage_value(usage, "completion_tokens", "output_tokens", "candidates_token_count")
+    )
+
+if crewai_event_bus is not None:
+    crewai_event_bus.on(LLMCallCompletedEvent)(_record_llm_call)
+
+
+def render():
+    """Return the body and content type of the /metrics response."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,118 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+# Define the structure for a single experience
+class Experience(BaseModel):
+    title: Optional[str] = Field(description="The job title.")
+    company: Optional[str] = Field(description="The company name.")
+    employment_type: Optional[str] = Field(description="e.g., 'Part-time', 'Internship'")
+    duration: Optional[str] = Field(description="The full duration string.")
+    description: Optional[str] = Field(description="The detailed description of the role.")
+
+# Define the structure for a single education entry
+class Education(BaseModel):
+    institution: Optional[str] = Field(description="The name of the school or university.")
+    degree: Optional[str] = Field(default=None, description="The degree name.")
+    field_of_study: Optional[str] = Field(default=None, description="The field of study.")
+    duration: Optional[str] = Field(default=None, description="The years of attendance.")
+    grade: Optional[str] = Field(default=None, description="The grade mentioned.")
+
+# Define the structure for a single activity
+class Activity(BaseModel):
+    """A single recent activity/post on LinkedIn which the user has engaged with for example posted, commented, etc."""
+    type: Optional[str] = Field(description="The type of activity, e.g., 'reposted this'.")
+    posted_ago: Optional[str] = Field(description="The time elapsed since posting.")
+    content: Optional[str] = Field(description="The full text content of the post.")
+
+# Define the main, top-level JSON structure
+class LinkedInProfile(BaseModel):
+    name: str = Field(description="The user's full name.")
+    headline: Optional[str] = Field(description="The professional headline.")
+    about: Optional[str] = Field(description="The complete text from the 'About' section.")
+    experiences: List[Experience] = Field(default=[], description="A list of all job experiences.")
+    education: List[Education] = Field(default=[], description="A list of all educational entries.")
+    activities: List[Activity] = Field(default=[], description="A list of ALL recent activities.")
+    interests: str = Field(description="A synthesized paragraph about professional interests.")
+    strengths: List[str] = Field(description="A list of key professional strengths.")
+    other: Optional[str] = Field(default=None, description="Any other relevant information like certifications or projects etc.")
+
+# Define the structure for the fields that can only be synthesized by the LLM
+class ProfileInsights(BaseModel):
+    """The synthesized part of a LinkedInProfile, produced from already extracted profile data."""
+    interests: str = Field(description="A synthesized paragraph about professional interests.")
+    strengths: List[str] = Field(description="A list of key professional strengths.")
+
+# Define the structure for connection vectors
+class ConnectionVector(BaseModel):
+    """A single, actionable reason for professional engagement."""
+    rank: int = Field(description="The rank of this vector's impact, from 1 (strongest).")
+    type: str = Field(description="The category of the vector (e.g., 'Timely Hook', 'Value Proposition').")
+    confidence: str = Field(description="Confidence level of this vector's impact ('High', 'Medium', or 'Low').")
+    detail: str = Field(description="The specific detail of the connection point.")
+    actionable_opener: str = Field(description="A compelling, ready-to-use opening line for a message that leverages this vector and reflects the confidence level.")
+
+# Define the structure for the engagement brief
+class EngagementBrief(BaseModel):
+    """An actionable brief containing ranked connection vectors and seniority analysis."""
+    seniority_dynamic: str = Field(description="Describes the seniority relationship (e.g., 'Peer to Peer', 'Junior to Senior', 'Senior to Junior').")
+    connection_vectors: List[ConnectionVector]
+
+# Define the structure for the output of the single-call fast mode
+class FastGenerationResult(BaseModel):
+    """The engagement brief and the final message, produced together by one LLM call."""
+    brief: EngagementBrief
+    message: str = Field(description="The final, ready-to-send outreach message.")
+
+# Define the structure for a single draft variant of a message generation request
+class MessageVariant(BaseModel):
+    tone: str = Field(description="The desired tone for this draft")
+    length: str = Field(description="The desired length of this draft")
+    call_to_action: Optional[str] = Field(default=None, description="The call to action for this draft; defaults to the request's")
+    extra_instruction: Optional[str] = Field(default=None, description="Extra instructions for this draft; default to the request's")
+
+# Define the structure for message generation request
+class GenerateMessageRequest(BaseModel):
+    user_data: dict = Field(description="The user's LinkedIn profile data")
+    target_html: Optional[str] = Field(default=None, description="The HTML content of the target profile; may be left out when target_hash names a page the server already has")
+    target_hash: Optional[str] = Field(default=None, description="SHA-256 hex digest of the UTF-8 target HTML, to reference a page uploaded earlier instead of sending it again")
+    tone: str = Field(description="The desired tone for the message (e.g., 'professional', 'casual', 'friendly')")
+    length: str = Field(description="The desired length of the message (e.g., 'short', 'medium', 'long')")
+    call_to_action: str = Field(description="The desired call to action")
+    extra_instruction: Optional[str] = Field(default="", description="Any additional instructions for message generation")
+    variants: Optional[List[MessageVariant]] = Field(default=None, description="Several tone/length drafts to write from the same brief, instead of a single message")
+    mode: Optional[str] = Field(default=None, description="'crew' for the three-agent pipeline or 'fast' for a single combined call; defaults to the server setting")
+    prefetch_job_id: Optional[str] = Field(default=None, description="The 'job_id' returned by /prefetch for this target; its parse is reused if it is of the same profile, and without target_html or target_hash its page is the target")
+
+# Define the structure for a rewrite request, reusing the brief of an earlier generation
+class RewriteMessageRequest(BaseModel):
+    brief_id: str = Field(description="The 'brief_id' returned by /generate")
+    tone: str = Field(description="The desired tone for the message (e.g., 'professional', 'casual', 'friendly')")
+    length: str = Field(description="The desired length of the message (e.g., 'short', 'medium', 'long')")
+    call_to_action: str = Field(description="The desired call to action")
+    extra_instruction: Optional[str] = Field(default="", description="Any additional instructions for message generation")
+
+# Define the structure for a single target of a batch request
+class BatchTarget(BaseModel):
+    id: Optional[str] = Field(default=None, description="An optional caller-side identifier echoed back in the result")
+    target_html: str = Field(description="The HTML content of the target profile")
+    tone: str = Field(description="The desired tone for the message (e.g., 'professional', 'casual', 'friendly')")
+    length: str = Field(description="The desired length of the message (e.g., 'short', 'medium', 'long')")
+    call_to_action: str = Field(description="The desired call to action")
+    extra_instruction: Optional[str] = Field(default="", description="Any additional instructions for message generation")
+
+# Define the structure for a batch generation request: one user, many targets
+class BatchGenerateRequest(BaseModel):
+    user_data: dict = Field(description="The user's LinkedIn profile data, shared by every target")
+    targets: List[BatchTarget] = Field(description="The target profiles and their message parameters")
+    parallelism: Optional[int] = Field(default=None, description="How many targets to process at once, capped by the server")
+    mode: Optional[str] = Field(default=None, description="'crew' or 'fast', as for /generate")
+
+# Define the structure for a request to parse a target profile ahead of /generate
+class PrefetchRequest(BaseModel):
+    target_html: Optional[str] = Field(default=None, description="The HTML content of the target profile")
+    target_hash: Optional[str] = Field(default=None, description="SHA-256 hex digest of the UTF-8 target HTML, for a page uploaded earlier")
+
+# Define the structure for switching verbose agent logging at runtime
+class VerboseSetting(BaseModel):
+    enabled: bool = Field(description="Whether agents log every prompt and answer")
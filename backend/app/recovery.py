@@ -0,0 +1,205 @@
+import json
+import re
+
+from pydantic import ValidationError
+
+LITERAL_END = ",}] \t\r\n"
+
+
+class _Frame:
+    """An open object or array; `expects` is what the parser waits for next inside it."""
+
+    def __init__(self, closer):
+        self.closer = closer
+        self.expects = "key" if closer == "}" else "value"
+
+
+class JSONRecovery:
+    """
+    Incremental, tolerant parser for the JSON object in a model response. Feed it
+    the response in chunks (or all at once): text before the first '{' (reasoning,
+    code fences) and after the matching '}' is ignored. If the response ends
+    before the object does, `value()` returns the object cut back to its last
+    complete value, so a truncated answer loses only the fields it did not finish;
+    `truncated_field` names the top-level field that was cut off mid-value.
+    """
+
+    def __init__(self):
+        self.done = False
+        self._started = False
+        self._text = []          # characters of the object read so far
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._in_literal = False
+        self._safe_length = 0    # the object can be cut after this many characters...
+        self._safe_closers = ""  # ...and closed with these
+        self._key_start = None
+        self._current_key = None  # the top-level key whose value is being read
+
+    def feed(self, chunk):
+        for char in chunk:
+            if self.done:
+                return
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._open("}", char)
+                continue
+            self._consume(char)
+
+    @property
+    def truncated(self):
+        return self._started and not self.done
+
+    @property
+    def truncated_field(self):
+        if not self.truncated or (len(self._stack) == 1 and self._stack[-1].expects != "value"):
+            return None
+        return self._current_key
+
+    def value(self):
+        """Return the parsed object, repaired if it was truncated; raises ValueError without one."""
+        if not self._started:
+            raise ValueError("Failed to find a valid JSON object in the model's response.")
+        text = "".join(self._text)
+        if self.truncated:
+            text = text[:self._safe_length] + self._safe_closers
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            # Trailing commas are the one syntax slip models make often enough to forgive
+            return json.loads(re.sub(r",\s*([}\]])", r"\1", text))
+
+    def _consume(self, char):
+        if self._in_string:
+            self._text.append(char)
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+                frame = self._stack[-1]
+                if frame.expects == "key":
+                    frame.expects = "colon"
+                    if len(self._stack) == 1:
+                        self._current_key = json.loads("".join(self._text[self._key_start:]))
+                else:
+                    self._value_complete()
+            return
+
+        if self._in_literal:
+            if char not in LITERAL_END:
+                self._text.append(char)
+                return
+            self._in_literal = False
+            self._value_complete()
+
+        if char in " \t\r\n":
+            self._text.append(char)
+        elif char == '"':
+            self._in_string = True
+            self._key_start = len(self._text)
+            self._text.append(char)
+        elif char in "{[":
+            self._open("}" if char == "{" else "]", char)
+        elif char in "}]":
+            self._text.append(char)
+            self._stack.pop()
+            if not self._stack:
+                self.done = True
+            else:
+                self._value_complete()
+        elif char == ":":
+            self._text.append(char)
+            self._stack[-1].expects = "value"
+        elif char == ",":
+            self._text.append(char)
+            frame = self._stack[-1]
+            frame.expects = "key" if frame.closer == "}" else "value"
+        else:
+            self._in_literal = True
+            self._text.append(char)
+
+    def _open(self, closer, char):
+        self._text.append(char)
+        self._stack.append(_Frame(closer))
+        self._mark_safe()
+
+    def _value_complete(self):
+        self._stack[-1].expects = "comma"
+        self._mark_safe()
+
+    def _mark_safe(self):
+        self._safe_length = len(self._text)
+        self._safe_closers = "".join(frame.closer for frame in reversed(self._stack))
+
+
+def recover_json(raw):
+    """
+    Return the JSON object in `raw`, and the top-level fields it lost to truncation.
+    A field cut off mid-value is dropped rather than kept half-written.
+    """
+    error = ValueError("Failed to find a valid JSON object in the model's response.")
+    # A brace in the reasoning before the answer is not the object; try the next one
+    for start in [match.start() for match in re.finditer(r"\{", raw)][:8]:
+        parser = JSONRecovery()
+        parser.feed(raw[start:])
+        try:
+            value = parser.value()
+        except ValueError as e:
+            error = e
+            continue
+        if isinstance(value, dict):
+            lost = [parser.truncated_field] if parser.truncated_field else []
+            return {key: item for key, item in value.items() if key not in lost}, lost
+    raise error
+
+
+def greedy_json(raw):
+    """The previous extraction: the first '{' to the last '}', which fails on truncation and stray braces."""
+    json_match = re.search(r'\{.*\}', raw, re.DOTALL)
+    if not json_match:
+        raise ValueError("Failed to find a valid JSON object in the model's response.")
+    return json.loads(json_match.group(0))
+
+
+def _set_path(data, loc, value):
+    for key in loc[:-1]:
+        data = data[key]
+    data[loc[-1]] = value
+
+
+def validate_fields(data, model):
+    """
+    Validate `data` against `model`. Missing keys are filled with None first, which
+    is enough for the optional ones. Returns the data without the top-level fields
+    that are still invalid, and the names of those fields.
+    """
+    if not isinstance(data, dict):
+        return {}, list(model.model_fields)
+    data = json.loads(json.dumps(data))
+    try:
+        return model.model_validate(data).model_dump(), []
+    except ValidationError as error:
+        errors = error.errors()
+    for detail in errors:
+        if detail["type"] == "missing":
+            try:
+                _set_path(data, detail["loc"], None)
+            except (KeyError, IndexError, TypeError):
+                pass
+    try:
+        return model.model_validate(data).model_dump(), []
+    except ValidationError as error:
+        invalid = sorted({str(detail["loc"][0]) for detail in error.errors() if detail["loc"]})
+    return {key: value for key, value in data.items() if key not in invalid}, invalid
+
+
+def field_schema(model, fields):
+    """The JSON schema of `model` reduced to `fields`, for asking for just those fields."""
+    schema = model.model_json_schema()
+    schema["properties"] = {key: value for key, value in schema["properties"].items() if key in fields}
+    schema["required"] = [key for key in schema.get("required", []) if key in fields]
+    return schema
@@ -0,0 +1,285 @@
+import logging
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+# Per-request details go to the metrics logger at debug level, not to stdout
+logger = logging.getLogger("metrics")
+
+# Tags whose content never carries profile text
+SKIPPED_TAGS = {"script", "style", "svg", "noscript", "template", "button", "img", "code", "iframe", "canvas"}
+
+# Tags that end the current line of text
+BLOCK_TAGS = {
+    "div", "p", "li", "ul", "ol", "section", "article", "header", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "br", "tr", "td", "dd", "dt", "hr",
+}
+
+# Inline tags LinkedIn uses as line containers: sibling spans hold separate
+# lines (e.g. 'Acme · Full-time' and the date range) and must not be glued
+LINE_TAGS = {"span"}
+
+# Inline tags whose text runs on with its neighbours, but not glued to them
+SEPARATED_TAGS = {"a"}
+
+# Void elements never get a closing tag, so they must not be pushed on the stack
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Classes LinkedIn uses for duplicated screen-reader text
+HIDDEN_CLASSES = {"visually-hidden", "a11y-text"}
+
+# Map LinkedIn's section anchor ids to the section keys used in the compact document
+SECTION_IDS = {
+    "about": "about",
+    "experience": "experience",
+    "education": "education",
+    "content_collections": "activity",
+    "featured": "featured",
+    "licenses_and_certifications": "certifications",
+    "projects": "projects",
+    "skills": "skills",
+    "volunteering_experience": "volunteering",
+    "honors_and_awards": "honors",
+    "publications": "publications",
+    "courses": "courses",
+    "languages": "languages",
+    "organizations": "organizations",
+    "recommendations": "recommendations",
+    "interests": "interests",
+    "patents": "patents",
+    "test_scores": "test_scores",
+    "causes": "causes",
+}
+
+# Sections that only appear on the viewer's own profile and say nothing about the person
+DROPPED_SECTIONS = {"analytics", "resources", "suggested", "suggested for you", "people also viewed", "people you may know"}
+
+# UI chrome that survives the tag filters
+NOISE_LINES = {
+    "show all", "show more", "show less", "see more", "see less", "…see more", "…more", "more",
+    "follow", "following", "message", "connect", "endorse", "pending", "contact info",
+    "connections", "followers",
+}
+
+NOISE_PATTERNS = [
+    re.compile(r"^show all \d+ .*$", re.IGNORECASE),
+    re.compile(r"^\d[\d,]* (followers|connections|comments?|reactions?|reposts?)$", re.IGNORECASE),
+    re.compile(r"^\d+\+? connections$", re.IGNORECASE),
+    # The count of '<span>500+</span> connections', now that spans end a line
+    re.compile(r"^\d[\d,]*\+$"),
+]
+
+
+# Define the structure for a single list entry (one job, one school, one post...)
+class ProfileEntry(BaseModel):
+    lines: List[str] = Field(default=[], description="The visible text lines of the entry, in page order.")
+    depth: int = Field(default=0, description="Nesting level, e.g. 1 for a role grouped under a company.")
+
+# Define the structure for a single profile section
+class ProfileSection(BaseModel):
+    key: str = Field(description="Normalized section key, e.g. 'experience'.")
+    title: str = Field(description="The section heading as shown on the page.")
+    lines: List[str] = Field(default=[], description="Text that does not belong to any list entry.")
+    entries: List[ProfileEntry] = Field(default=[], description="The list entries of the section.")
+
+# Define the output of the reducer
+class ReducedProfile(BaseModel):
+    sections: List[ProfileSection] = Field(default=[])
+    text: str = Field(description="The compact, section-tagged text document.")
+    original_bytes: int = Field(description="Size of the input HTML in bytes.")
+    reduced_bytes: int = Field(description="Size of the compact document in bytes.")
+
+    def section(self, key: str) -> Optional[ProfileSection]:
+        for section in self.sections:
+            if section.key == key:
+                return section
+        return None
+
+
+def _normalize_space(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+def _is_noise(line):
+    lowered = line.lower()
+    if lowered in NOISE_LINES:
+        return True
+    return any(pattern.match(line) for pattern in NOISE_PATTERNS)
+
+
+class _ProfileHTMLParser(HTMLParser):
+    """Walks the profile DOM once and collects visible text per section and list entry."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sections: List[ProfileSection] = []
+        self._stack = []         # open tags as (tag, hides its content, opened a list entry)
+        self._hidden_depth = 0   # number of open tags that hide their content
+        self._entries = []       # open <li> entries, innermost last
+        self._buffer = []
+        self._in_heading = False
+        self._section_depth = 0
+
+    # --- section and entry bookkeeping ---
+
+    def _current_section(self):
+        if not self.sections:
+            self.sections.append(ProfileSection(key="intro", title="Intro"))
+        return self.sections[-1]
+
+    def _flush(self):
+        line = _normalize_space("".join(self._buffer))
+        self._buffer = []
+        if not line or _is_noise(line):
+            return
+        section = self._current_section()
+        if self._in_heading and not section.title:
+            section.title = line
+            if not section.key:
+                section.key = line.lower()
+            return
+        target = self._entries[-1].lines if self._entries else section.lines
+        # LinkedIn often renders the same text twice in adjacent nodes
+        if target and target[-1] == line:
+            return
+        target.append(line)
+
+    # --- HTMLParser hooks ---
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = set((attrs.get("class") or "").split())
+        hides = (
+            tag in SKIPPED_TAGS
+            or bool(classes & HIDDEN_CLASSES)
+            or "hidden" in attrs
+        )
+
+        if tag in BLOCK_TAGS or tag in LINE_TAGS:
+            self._flush()
+        elif tag in SEPARATED_TAGS:
+            self._buffer.append(" ")
+
+        if hides:
+            self._hidden_depth += 1
+
+        if tag == "section" and self._section_depth == 0:
+            self.sections.append(ProfileSection(key="", title=""))
+        if tag == "section":
+            self._section_depth += 1
+
+        section_id = attrs.get("id")
+        if section_id in SECTION_IDS and self.sections:
+            self._current_section().key = SECTION_IDS[section_id]
+
+        opens_entry = tag == "li" and not self._hidden_depth
+        if opens_entry:
+            entry = ProfileEntry(depth=len(self._entries))
+            self._current_section().entries.append(entry)
+            self._entries.append(entry)
+        if tag in VOID_TAGS:
+            if hides:
+                self._hidden_depth -= 1
+        else:
+            self._stack.append((tag, hides, opens_entry))
+        if tag in ("h1", "h2"):
+            self._in_heading = tag == "h2"
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS:
+                self._flush()
+            return
+        # Unwind to the matching open tag, tolerating unclosed children
+        if not any(open_tag == tag for open_tag, _, _ in self._stack):
+            return
+        if tag in BLOCK_TAGS or tag in LINE_TAGS:
+            self._flush()
+        elif tag in SEPARATED_TAGS:
+            self._buffer.append(" ")
+        while self._stack:
+            open_tag, hides, opens_entry = self._stack.pop()
+            if hides:
+                self._hidden_depth -= 1
+            if opens_entry:
+                self._flush()
+                self._entries.pop()
+            if open_tag == "section":
+                self._section_depth -= 1
+            if open_tag in ("h1", "h2"):
+                self._in_heading = False
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._hidden_depth:
+            return
+        self._buffer.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _render(sections):
+    """Render the sections into the compact text document sent to the agents."""
+    parts = []
+    for section in sections:
+        body = list(section.lines)
+        for entry in section.entries:
+            if not entry.lines:
+                continue
+            indent = "  " * entry.depth
+            body.append(f"{indent}- {entry.lines[0]}")
+            body.extend(f"{indent}  {line}" for line in entry.lines[1:])
+        if not body:
+            continue
+        parts.append(f"## {section.title or section.key.title()}\n" + "\n".join(body))
+    return "\n\n".join(parts)
+
+
+def reduce_profile_html(html: str) -> ReducedProfile:
+    """
+    Reduce LinkedIn profile HTML to a compact, section-tagged text document.
+
+    Markup, SVGs, scripts, screen-reader duplicates and UI chrome are dropped;
+    visible text is kept in page order, grouped by section and list entry.
+    """
+    parser = _ProfileHTMLParser()
+    parser.feed(html)
+    parser.close()
+
+    sections = []
+    for section in parser.sections:
+        if not section.key:
+            section.key = "intro" if not sections else "other"
+        if not section.title:
+            section.title = section.key.replace("_", " ").title()
+        if section.key in DROPPED_SECTIONS or section.title.lower() in DROPPED_SECTIONS:
+            continue
+        if not section.lines and not any(entry.lines for entry in section.entries):
+            continue
+        sections.append(section)
+
+    text = _render(sections)
+    return ReducedProfile(
+        sections=sections,
+        text=text,
+        original_bytes=len(html.encode("utf-8")),
+        reduced_bytes=len(text.encode("utf-8")),
+    )
+
+
+def compact_profile_text(html: str, reduced: Optional[ReducedProfile] = None) -> str:
+    """
+    Return the compact document for a profile page, falling back to the raw HTML
+    when the reducer finds nothing usable (e.g. the page layout changed).
+    """
+    reduced = reduced or reduce_profile_html(html)
+    if not reduced.text:
+        logger.debug("Profile reducer found no content, sending raw HTML")
+        return html
+    ratio = reduced.reduced_bytes / max(reduced.original_bytes, 1)
+    logger.debug("Reduced profile HTML from %d to %d bytes (%.1f%%)", reduced.original_bytes, reduced.reduced_bytes, ratio * 100)
+    return reduced.text
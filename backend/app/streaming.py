@@ -0,0 +1,69 @@
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+except ImportError:
+    try:
+        from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        # Older crewai without stream events: the final message is still sent, just not token by token
+        crewai_event_bus = None
+        LLMStreamChunkEvent = None
+
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+# The token callback of the crew run in the current context. A context variable rather
+# than a thread-local, because crewai may run the agent loop on a helper thread that
+# inherits the context of the kickoff.
+_token_sink = ContextVar("token_sink", default=None)
+
+
+def _forward_chunk(source, event):
+    callback = _token_sink.get()
+    if callback is not None:
+        callback(event.chunk)
+
+if crewai_event_bus is not None:
+    crewai_event_bus.on(LLMStreamChunkEvent)(_forward_chunk)
+
+
+class FinalAnswerFilter:
+    """
+    Agents stream their reasoning ('Thought: ...') before the answer; only the
+    text after 'Final Answer:' is forwarded to the client.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self._buffer = ""
+        self._answering = False
+
+    def __call__(self, chunk):
+        if self._answering:
+            self.callback(chunk)
+            return
+        self._buffer += chunk
+        marker_at = self._buffer.find(FINAL_ANSWER_MARKER)
+        if marker_at != -1:
+            self._answering = True
+            answer = self._buffer[marker_at + len(FINAL_ANSWER_MARKER):].lstrip()
+            if answer:
+                self.callback(answer)
+
+
+@contextmanager
+def stream_tokens_to(callback):
+    """Send the final-answer tokens of the LLM calls made in this context to `callback`."""
+    token = _token_sink.set(FinalAnswerFilter(callback))
+    try:
+        yield
+    finally:
+        _token_sink.reset(token)
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,123 @@
+"""
+Measure the setup overhead of a request: building the LLM client, agent, task and
+crew from scratch (the previous behaviour) against reusing the registry's client
+and binding a copy of the prebuilt crew template.
+
+Reports the one-time startup cost (importing the backend, which builds the
+templates), the per-request setup time of each approach, and the end-to-end time
+of a message-writer run against the local fake LLM (fake_llm.py), where the
+reused client also keeps its HTTP connection alive. Usage:
+
+    python client_overhead.py --iterations 50 --output overhead.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from fake_llm import start_fake_llm
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "mean_ms": round(statistics.mean(samples), 2),
+        "p50_ms": round(statistics.median(samples), 2),
+        "max_ms": round(max(samples), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Fake LLM latency; 0 isolates the overhead")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    args = parser.parse_args()
+
+    server, base_url, _ = start_fake_llm(0, args.latency_ms, 0)
+    os.environ["LLM_MODEL"] = "openai/fake-model"
+    os.environ["LLM_BASE_URL"] = base_url
+    sys.path.insert(0, APP_DIR)
+    started = time.perf_counter()
+    import endpoint
+    import_ms = (time.perf_counter() - started) * 1000
+    from clients import CrewTemplate
+    from crewai import Crew
+
+    entry = {
+        "brief": {"seniority_dynamic": "Peer to Peer", "connection_vectors": []},
+        "target_name": "Jane Doe"
+    }
+    inputs = {
+        "brief": json.dumps(entry["brief"]),
+        "target_name": entry["target_name"],
+        "tone": "friendly",
+        "length": "short",
+        "call_to_action": "a 15-minute call",
+        "extra_instructions": ""
+    }
+
+    def fresh_crew():
+        # What every request used to do
+        llm = endpoint.create_llm("bench", 0.8)
+        agent = endpoint.create_message_writer_agent(llm)
+        return Crew(agents=[agent], tasks=[endpoint.create_write_message_task(agent)], verbose=False)
+
+    def reused_crew():
+        return endpoint.crew_templates["message"].bind(endpoint.llm_clients.get("bench", 0.8))
+
+    def build_templates():
+        template_llm = endpoint.create_llm("unbound", 0.0)
+        for agent_factory, task_factory in [
+            (endpoint.create_linkedin_profile_processor, endpoint.create_process_user_profile_task),
+            (endpoint.create_linkedin_profile_processor, endpoint.create_process_target_profile_task),
+            (endpoint.create_linkedin_profile_processor, endpoint.create_synthesize_profile_task),
+            (endpoint.create_engagement_strategist, endpoint.create_connection_analysis_task),
+            (endpoint.create_message_writer_agent, endpoint.create_write_message_task),
+            (endpoint.create_fast_outreach_agent, endpoint.create_fast_generation_task),
+        ]:
+            CrewTemplate(agent_factory, task_factory, template_llm)
+
+    # Warm up both paths once so imports and lazy initialisation are not counted
+    fresh_crew().kickoff(inputs=inputs)
+    reused_crew().kickoff(inputs=inputs)
+
+    fresh_setup = timed(fresh_crew, args.iterations)
+    reused_setup = timed(reused_crew, args.iterations)
+    fresh_run = timed(lambda: fresh_crew().kickoff(inputs=inputs), args.iterations)
+    reused_run = timed(lambda: reused_crew().kickoff(inputs=inputs), args.iterations)
+    report = {
+        "startup": {
+            "import_backend_ms": round(import_ms, 1),
+            "build_templates_ms": timed(build_templates, 3)["mean_ms"],
+        },
+        "per_request_setup": {
+            "fresh": fresh_setup,
+            "reused": reused_setup,
+            "saved_ms": round(fresh_setup["mean_ms"] - reused_setup["mean_ms"], 2),
+        },
+        "writer_run": {
+            "fresh": fresh_run,
+            "reused": reused_run,
+            "saved_ms": round(fresh_run["mean_ms"] - reused_run["mean_ms"], 2),
+        },
+        "llm_clients": endpoint.llm_clients.stats(),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
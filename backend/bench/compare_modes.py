@@ -0,0 +1,106 @@
+"""
+Compare the three-agent crew pipeline with the single-call fast mode.
+
+Both pipelines run in-process against the local fake LLM (fake_llm.py), for every
+page of the fixture corpus, with cold caches. The report gives the latency, the
+number of LLM calls and the prompt/completion tokens of each mode, and the
+savings of fast mode. Usage:
+
+    python compare_modes.py --latency-ms 300 --per-size 3 --output modes.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from fake_llm import start_fake_llm
+from fixtures import corpus
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    latencies = [sample["latency_ms"] for sample in samples]
+    return {
+        "runs": len(samples),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 1),
+            "p50": round(percentile(latencies, 0.50), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+        },
+        "llm_calls": round(statistics.mean(sample["llm_calls"] for sample in samples), 2),
+        "prompt_tokens": round(statistics.mean(sample["prompt_tokens"] for sample in samples), 1),
+        "completion_tokens": round(statistics.mean(sample["completion_tokens"] for sample in samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--ms-per-1k-prompt-tokens", type=float, default=50)
+    parser.add_argument("--per-size", type=int, default=3, help="Fixture pages per size")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    args = parser.parse_args()
+
+    server, base_url, stats = start_fake_llm(0, args.latency_ms, args.ms_per_1k_prompt_tokens)
+    os.environ["LLM_MODEL"] = "openai/fake-model"
+    os.environ["LLM_BASE_URL"] = base_url
+    sys.path.insert(0, APP_DIR)
+    import endpoint
+    from models import GenerateMessageRequest
+
+    llm = endpoint.llm_clients.get("bench", 0.8)
+    pipelines = {"crew": endpoint.run_generate_pipeline, "fast": endpoint.run_fast_pipeline}
+    pages = corpus(per_size=args.per_size)
+
+    results = {}
+    for mode, pipeline in pipelines.items():
+        endpoint.target_profile_cache.clear()
+        endpoint.engagement_brief_cache.clear()
+        samples = []
+        for name, html in pages:
+            request = GenerateMessageRequest(
+                user_data={"name": "Bench User", "headline": "Software Engineer at Globex"},
+                target_html=html,
+                tone="friendly",
+                length="short",
+                call_to_action="a 15-minute call"
+            )
+            stats.reset()
+            started = time.perf_counter()
+            pipeline(request, llm)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            usage = stats.snapshot()
+            samples.append({
+                "page": name,
+                "latency_ms": elapsed_ms,
+                "llm_calls": usage["total_calls"],
+                "prompt_tokens": usage["prompt_tokens"],
+                "completion_tokens": usage["completion_tokens"],
+            })
+        results[mode] = summarize(samples)
+
+    crew, fast = results["crew"], results["fast"]
+    results["fast_savings"] = {
+        "latency": f"{1 - fast['latency_ms']['mean'] / crew['latency_ms']['mean']:.1%}",
+        "llm_calls": f"{1 - fast['llm_calls'] / crew['llm_calls']:.1%}",
+        "prompt_tokens": f"{1 - fast['prompt_tokens'] / crew['prompt_tokens']:.1%}",
+        "completion_tokens": f"{1 - fast['completion_tokens'] / crew['completion_tokens']:.1%}",
+    }
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report + "\n")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Field-level accuracy and latency of the rule-based extractor against the agent parse.
+
+Every saved page (see fixtures.py) is reduced, then parsed two ways: by the
+extractor, and by the agent ('target_profile' stage) on the compact document.
+Each LinkedInProfile field is compared with the page's expected value:
+names, titles, companies, dates and the like must match exactly (ignoring case
+and whitespace), and long texts (about, descriptions, post text, other) must
+share at least TEXT_MATCH_F1 of their words. List entries are compared in page
+order, so a missing or extra entry counts against every field of it.
+
+The agent answers come from one of:
+
+    --agent fake      the local fake LLM (default). Gives the agent path's
+                      latency; its canned answer says nothing about accuracy,
+                      so no agent accuracy is reported.
+    --agent live      the model set by LLM_MODEL / LLM_BASE_URL, with the key in
+                      --api-key or LLM_API_KEY. --record DIR saves every answer
+                      as DIR/<page>.json.
+    --agent recorded  the answers saved by a live run, from --recorded DIR.
+
+The report gives the accuracy per field of each path and of the routed path
+(the extractor when its confidence clears MIN_EXTRACTION_CONFIDENCE, the
+agent otherwise), the extractor's confidence and latency per page, and the
+agent's latency. It exits with status 1 if a page is routed differently than
+its expected 'fast_path', or a page routed to the extractor has a field wrong.
+Usage:
+
+    python extraction_accuracy.py
+    python extraction_accuracy.py --agent live --record agent_outputs
+    python extraction_accuracy.py --agent recorded --recorded agent_outputs
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from fake_llm import start_fake_llm
+from fixtures import saved_pages
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+SCALAR_FIELDS = ["name", "headline", "about", "other"]
+ENTRY_FIELDS = {
+    "experiences": ["title", "company", "employment_type", "duration", "description"],
+    "education": ["institution", "degree", "field_of_study", "duration", "grade"],
+    "activities": ["type", "posted_ago", "content"],
+}
+TEXT_FIELDS = {"about", "other", "description", "content"}
+# Share of words a long text must have in common with the expected one
+TEXT_MATCH_F1 = 0.8
+
+
+def _normalize(value):
+    return re.sub(r"\s+", " ", value).strip().lower() if isinstance(value, str) and value.strip() else None
+
+
+def _word_f1(expected, actual):
+    expected_words, actual_words = re.findall(r"\w+", expected), re.findall(r"\w+", actual)
+    common = sum(min(expected_words.count(word), actual_words.count(word)) for word in set(expected_words))
+    if not common:
+        return 0.0
+    precision, recall = common / len(actual_words), common / len(expected_words)
+    return 2 * precision * recall / (precision + recall)
+
+
+def field_matches(field, expected, actual):
+    expected, actual = _normalize(expected), _normalize(actual)
+    if expected is None or actual is None:
+        return expected == actual
+    if field in TEXT_FIELDS:
+        return _word_f1(expected, actual) >= TEXT_MATCH_F1
+    return expected == actual
+
+
+def score(expected, actual):
+    """Return {field: (correct, total)} for one parsed profile against the expected one."""
+    scores = {}
+    for field in SCALAR_FIELDS:
+        scores[field] = (int(field_matches(field, expected.get(field), actual.get(field))), 1)
+    for key, fields in ENTRY_FIELDS.items():
+        expected_entries, actual_entries = expected.get(key) or [], actual.get(key) or []
+        for field in fields:
+            pairs = [
+                (expected_entries[index] if index < len(expected_entries) else {},
+                 actual_entries[index] if index < len(actual_entries) else {})
+                for index in range(max(len(expected_entries), len(actual_entries)))
+            ]
+            correct = sum(field_matches(field, left.get(field), right.get(field)) for left, right in pairs)
+            scores[f"{key}.{field}"] = (correct, len(pairs))
+    return scores
+
+
+def wrong_fields(scores):
+    return [field for field, (correct, total) in scores.items() if correct < total]
+
+
+def accuracy(all_scores):
+    """Accuracy per field over all pages, plus the overall share of correct field values."""
+    totals = {}
+    for scores in all_scores:
+        for field, (correct, total) in scores.items():
+            totals.setdefault(field, [0, 0])
+            totals[field][0] += correct
+            totals[field][1] += total
+    result = {field: round(correct / total, 3) for field, (correct, total) in totals.items() if total}
+    correct = sum(value[0] for value in totals.values())
+    total = sum(value[1] for value in totals.values())
+    result["overall"] = round(correct / total, 3) if total else None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agent", choices=["fake", "live", "recorded"], default="fake")
+    parser.add_argument("--api-key", default=os.environ.get("LLM_API_KEY", "bench"), help="API key for --agent live")
+    parser.add_argument("--record", help="With --agent live, save every agent answer in this directory")
+    parser.add_argument("--recorded", help="With --agent recorded, the directory of saved agent answers")
+    parser.add_argument("--repeats", type=int, default=20, help="Extractor runs per page for its latency")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Latency of the fake LLM")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    args = parser.parse_args()
+    if args.agent == "recorded" and not args.recorded:
+        parser.error("--agent recorded needs --recorded DIR")
+
+    if args.agent == "fake":
+        server, base_url, _ = start_fake_llm(0, args.latency_ms, 50)
+        os.environ["LLM_MODEL"] = "openai/fake-model"
+        os.environ["LLM_BASE_URL"] = base_url
+    os.environ["CACHE_PATH"] = ""
+    sys.path.insert(0, APP_DIR)
+    from extractor import MIN_EXTRACTION_CONFIDENCE, extract_profile
+    from models import LinkedInProfile
+    from reducer import reduce_profile_html
+
+    if args.agent != "recorded":
+        import endpoint
+        llm = endpoint.llm_clients.get(args.api_key, 0.4)
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+
+    pages, failures = [], 0
+    extractor_scores, agent_scores, routed_scores = [], [], []
+    agent_latencies = []
+    for name, html, expected in saved_pages():
+        reduced = reduce_profile_html(html)
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            extraction = extract_profile(reduce_profile_html(html))
+            timings.append((time.perf_counter() - started) * 1000)
+        fast_path = extraction.confidence >= MIN_EXTRACTION_CONFIDENCE
+        extracted = score(expected["profile"], extraction.profile)
+        extractor_scores.append(extracted)
+
+        agent_answer, agent_ms = None, None
+        if args.agent == "recorded":
+            path = os.path.join(args.recorded, name + ".json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as file:
+                    agent_answer = json.load(file)
+        else:
+            document = reduced.text or html
+            started = time.perf_counter()
+            result = endpoint.run_crew("target_profile", llm, {"target_html": document})
+            agent_answer = endpoint.recover_output(result.raw, "target_profile", LinkedInProfile, llm, document)
+            agent_ms = (time.perf_counter() - started) * 1000
+            agent_latencies.append(agent_ms)
+            if args.record:
+                with open(os.path.join(args.record, name + ".json"), "w", encoding="utf-8") as file:
+                    json.dump(agent_answer, file, indent=2, ensure_ascii=False)
+        agent = score(expected["profile"], agent_answer) if agent_answer is not None and args.agent != "fake" else None
+        if agent is not None:
+            agent_scores.append(agent)
+        routed = extracted if fast_path else agent
+        if routed is not None:
+            routed_scores.append(routed)
+
+        ok = fast_path == expected["fast_path"] and not (fast_path and wrong_fields(extracted))
+        failures += not ok
+        pages.append({
+            "page": name,
+            "ok": ok,
+            "confidence": extraction.confidence,
+            "fast_path": fast_path,
+            "expected_fast_path": expected["fast_path"],
+            "extractor_ms_p50": round(statistics.median(timings), 2),
+            "extractor_wrong": wrong_fields(extracted),
+            "agent_ms": round(agent_ms, 1) if agent_ms is not None else None,
+            "agent_wrong": wrong_fields(agent) if agent is not None else None,
+        })
+
+    report = {
+        "config": {"agent": args.agent, "pages": len(pages), "min_confidence": MIN_EXTRACTION_CONFIDENCE},
+        "pages": pages,
+        "accuracy": {
+            "extractor": accuracy(extractor_scores),
+            "agent": accuracy(agent_scores) if agent_scores else None,
+            "routed": accuracy(routed_scores) if len(routed_scores) == len(pages) else None,
+        },
+        "latency_ms": {
+            "extractor_p50": round(statistics.median(page["extractor_ms_p50"] for page in pages), 2),
+            "agent_p50": round(statistics.median(agent_latencies), 1) if agent_latencies else None,
+        },
+        "failed": failures,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    if args.agent == "fake":
+        server.shutdown()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
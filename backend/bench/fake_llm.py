@@ -0,0 +1,213 @@
+"""
+A local stand-in for the LLM API, used by the benchmarks instead of Gemini.
+
+It speaks the OpenAI chat completions protocol, so the backend can be pointed at
+it with LLM_MODEL=openai/fake-model and LLM_BASE_URL=http://127.0.0.1:<port>/v1.
+Each response is a canned output chosen from the schema the prompt asks for
+(LinkedInProfile, ProfileInsights, EngagementBrief, FastGenerationResult, or a
+plain message), delayed by a configurable latency that grows with the prompt
+size. Token counts are estimated at 4 characters per token and exposed on
+GET /stats. A fraction of the JSON answers can be cut off halfway
+(--truncate-rate), as a model does when it hits its output limit; answers to
+follow-up requests for missing fields are never cut.
+
+Run it on its own with: python fake_llm.py --port 9000 --latency-ms 300
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROFILE = {
+    "name": "Jane Doe",
+    "headline": "Machine Learning Engineer at Acme",
+    "about": "I build ML systems that ship.",
+    "experiences": [{"title": "Machine Learning Engineer", "company": "Acme", "employment_type": "Full-time",
+                     "duration": "Jan 2024 - Present · 2 yrs", "description": "Worked on LLM inference."}],
+    "education": [{"institution": "Cairo University", "degree": "Bachelor of Engineering - BE",
+                   "field_of_study": "Computer Engineering", "duration": "2012 - 2017", "grade": "Excellent"}],
+    "activities": [{"type": "posted this", "posted_ago": "1w", "content": "Shipping a new inference stack."}],
+    "interests": "Passionate about LLM inference and MLOps.",
+    "strengths": ["Machine learning", "MLOps", "Python"],
+    "other": None,
+}
+
+INSIGHTS = {
+    "interests": "Passionate about LLM inference and MLOps.",
+    "strengths": ["Machine learning", "MLOps", "Python"],
+}
+
+BRIEF = {
+    "seniority_dynamic": "Peer to Peer",
+    "connection_vectors": [
+        {"rank": 1, "type": "Timely Hook", "confidence": "High",
+         "detail": "The target recently posted about shipping a new inference stack.",
+         "actionable_opener": "Congrats on shipping the new inference stack, the latency numbers looked impressive."},
+        {"rank": 2, "type": "Shared Experience", "confidence": "Medium",
+         "detail": "Both studied Computer Engineering at Cairo University.",
+         "actionable_opener": "I noticed we both studied Computer Engineering at Cairo University."},
+    ],
+}
+
+MESSAGE = (
+    "Hi Jane, congrats on shipping the new inference stack, the latency numbers looked impressive. "
+    "I work on similar problems at Globex and would love to swap notes. Open to a quick 15-minute call next week?"
+)
+CONNECTION_REQUEST = "Hi Jane, congrats on the new inference stack! I work on similar problems and would love to connect."
+
+
+def canned_output(prompt):
+    """Pick the canned answer for the schema the prompt asks for; the most specific schema wins."""
+    if "FastGenerationResult" in prompt:
+        return "fast", json.dumps({"brief": BRIEF, "message": MESSAGE})
+    if "ProfileInsights" in prompt:
+        return "insights", json.dumps(INSIGHTS)
+    if "EngagementBrief" in prompt:
+        return "brief", json.dumps(BRIEF)
+    if "LinkedInProfile" in prompt:
+        return "profile", json.dumps(PROFILE)
+    if "`Connection Request`" in prompt:
+        return "message", CONNECTION_REQUEST
+    return "message", MESSAGE
+
+
+class FakeLLMStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = {}
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+    def record(self, kind, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+def make_handler(stats, latency_ms, ms_per_1k_prompt_tokens, truncate_rate=0.0):
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                self._send_json(200, stats.snapshot())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.rstrip("/").endswith("/reset"):
+                stats.reset()
+                self._send_json(200, {"status": "ok"})
+                return
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": "not found"})
+                return
+
+            prompt = "\n".join(str(message.get("content") or "") for message in body.get("messages", []))
+            kind, answer = canned_output(prompt)
+            follow_up = "were missing, cut off or invalid" in prompt
+            if kind != "message" and not follow_up and random.random() < truncate_rate:
+                answer = answer[:len(answer) // 2]
+                kind += "_truncated"
+            if body.get("response_format"):
+                # Structured output requests get the bare JSON document
+                content = answer
+            else:
+                content = f"Thought: I now can give a great answer\nFinal Answer: {answer}"
+            prompt_tokens = max(1, len(prompt) // 4)
+            completion_tokens = max(1, len(content) // 4)
+            stats.record(kind, prompt_tokens, completion_tokens)
+            time.sleep((latency_ms + ms_per_1k_prompt_tokens * prompt_tokens / 1000) / 1000)
+
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            model = body.get("model", "fake-model")
+            if body.get("stream"):
+                self._stream(completion_id, model, content, usage)
+                return
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            })
+
+        def _stream(self, completion_id, model, content, usage):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            words = content.split(" ")
+            for index, word in enumerate(words):
+                piece = word if index == len(words) - 1 else word + " "
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            final = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+            self.close_connection = True
+
+    return FakeLLMHandler
+
+
+def start_fake_llm(port=0, latency_ms=300, ms_per_1k_prompt_tokens=50, truncate_rate=0.0):
+    """Start the server on a background thread; returns (server, base_url, stats)."""
+    stats = FakeLLMStats()
+    handler = make_handler(stats, latency_ms, ms_per_1k_prompt_tokens, truncate_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1", stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=300, help="Fixed latency of every call")
+    parser.add_argument("--ms-per-1k-prompt-tokens", type=float, default=50, help="Extra latency per 1000 prompt tokens")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraction of JSON answers cut off halfway")
+    args = parser.parse_args()
+    server, base_url, _ = start_fake_llm(args.port, args.latency_ms, args.ms_per_1k_prompt_tokens, args.truncate_rate)
+    print(f"Fake LLM listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,165 @@
+"""
+Profile pages for the benchmarks and the tests.
+
+The synthetic pages mirror the structure of a real profile's <main> element
+(section anchors, list entries, visually-hidden duplicates, SVG icons, UI
+buttons) so the reducer and the extractor do the same work they do in
+production, and can be generated at any size.
+
+The saved pages in pages/ keep the layout of real profiles, anonymised: one
+<span> per line, descriptions and skills in nested sub-component lists, roles
+grouped under a company, pretty-printed and minified markup. Each page comes
+with the LinkedInProfile fields a careful reader would take from it (without
+'interests' and 'strengths', which are synthesized) and whether the rule-based
+extractor is expected to handle it without the LLM.
+"""
+import json
+import os
+import random
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+# Number of (experiences, activities, description sentences) per page size
+SIZES = {
+    "small": (2, 1, 2),
+    "medium": (5, 5, 6),
+    "large": (12, 20, 15),
+}
+
+FIRST_NAMES = ["Jane", "Omar", "Mona", "Karim", "Sara", "Youssef", "Laila", "Adam"]
+LAST_NAMES = ["Doe", "Hassan", "Ibrahim", "Nasser", "Farouk", "Saleh", "Mansour", "Adel"]
+TITLES = ["Machine Learning Engineer", "Data Scientist", "Software Engineer", "Product Manager", "Engineering Manager", "Research Scientist"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+SCHOOLS = ["Cairo University", "Ain Shams University", "The American University in Cairo", "Alexandria University"]
+TOPICS = ["LLM inference", "MLOps", "recommendation systems", "data platforms", "computer vision", "developer tooling"]
+
+ICON = (
+    '<svg role="none" aria-hidden="true" xmlns="http://www.w3.org/2000/svg" width="24" height="24" '
+    'viewBox="0 0 24 24" data-supported-dps="24x24" class="mercado-match" focusable="false">'
+    '<path d="M14 12a2 2 0 11-2-2 2 2 0 012 2zM4 10a2 2 0 102 2 2 2 0 00-2-2zm16 0a2 2 0 102 2 2 2 0 00-2-2z"></path></svg>'
+)
+
+
+def _text(text):
+    # LinkedIn renders every visible string twice: once for display, once for screen readers
+    return (
+        f'<span aria-hidden="true"><!---->{text}<!----></span>'
+        f'<span class="visually-hidden"><!---->{text}<!----></span>'
+    )
+
+def _entry(lines, nested=""):
+    body = "".join(
+        f'<div class="display-flex align-items-center mr1 t-bold"><div class="display-flex full-width">{_text(line)}</div></div>'
+        for line in lines
+    )
+    return (
+        '<li class="artdeco-list__item pvs-list__item--line-separated pvs-list__item--one-column" '
+        'id="profilePagedListComponent-ACoAA" data-view-name="profile-component-entity">'
+        '<div class="pvs-entity--padded pvs-entity--with-hover-state" data-view-name="profile-component-entity">'
+        f'<div><a class="optional-action-target-wrapper display-flex" href="#">{ICON}</a></div>'
+        f'<div class="display-flex flex-column full-width align-self-center">{body}</div>{nested}</div></li>'
+    )
+
+def _section(anchor, title, entries):
+    return (
+        '<section data-view-name="profile-card" class="artdeco-card pv-profile-card break-words mt2">'
+        f'<div id="{anchor}" class="pv-profile-card__anchor"></div>'
+        '<div class="pvs-header__container"><div class="pvs-header__top-container--no-stack">'
+        f'<h2 class="pvs-header__title text-heading-large">{_text(title)}</h2></div></div>'
+        f'<div class="pvs-list__outer-container"><ul class="pvs-list ph5 display-flex flex-row flex-wrap">{"".join(entries)}</ul></div>'
+        '<div class="pvs-list__footer-wrapper"><a class="optional-action-target-wrapper" href="#">'
+        f'<span class="pvs-navigation__text">Show all {len(entries)} {title.lower()}</span>{ICON}</a></div></section>'
+    )
+
+def _sentences(rng, count):
+    return " ".join(
+        f"Worked on {rng.choice(TOPICS)} with {rng.choice(['a small team', 'partners', 'research', 'customers'])}, "
+        f"improving {rng.choice(['latency', 'cost', 'quality', 'reliability'])} by {rng.randint(5, 60)}%."
+        for _ in range(count)
+    )
+
+
+def profile_html(size="medium", seed=0):
+    """Return the <main> HTML of a synthetic profile of the given size."""
+    experience_count, activity_count, sentence_count = SIZES[size]
+    rng = random.Random(f"{size}-{seed}")
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    headline = f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} | {rng.choice(TOPICS).title()}"
+
+    top_card = (
+        '<section class="artdeco-card pv-top-card"><div class="ph5 pb5"><div class="mt2 relative">'
+        f'<div><h1 class="text-heading-xlarge inline t-24 v-align-middle break-words">{name}</h1></div>'
+        f'<div class="text-body-medium break-words">{headline}</div>'
+        '<div class="mt2"><span class="text-body-small inline t-black--light break-words">Cairo, Egypt</span></div>'
+        '<ul><li class="text-body-small"><span class="t-bold">500+</span> connections</li></ul>'
+        f'<button class="artdeco-button">{ICON}<span>Connect</span></button>'
+        '<button class="artdeco-button"><span>Message</span></button></div></div></section>'
+    )
+    about = (
+        '<section class="artdeco-card pv-profile-card">'
+        '<div id="about" class="pv-profile-card__anchor"></div>'
+        f'<div class="pvs-header__container"><h2 class="pvs-header__title">{_text("About")}</h2></div>'
+        '<div class="display-flex ph5 pv3"><div class="inline-show-more-text--is-collapsed">'
+        f'{_text(_sentences(rng, sentence_count))}'
+        '<button class="inline-show-more-text__button">…see more</button></div></div></section>'
+    )
+    activities = [
+        _entry([
+            f"{name} {rng.choice(['posted this', 'reposted this', 'commented on a post'])}",
+            f"{index + 1}{rng.choice(['d', 'w', 'mo'])}",
+            _sentences(rng, sentence_count),
+        ])
+        for index in range(activity_count)
+    ]
+    experiences = []
+    for index in range(experience_count):
+        start_year = 2024 - 2 * index
+        end = "Present" if index == 0 else f"Dec {start_year + 1}"
+        experiences.append(_entry([
+            rng.choice(TITLES),
+            f"{rng.choice(COMPANIES)} · {rng.choice(['Full-time', 'Part-time', 'Contract'])}",
+            f"Jan {start_year} - {end} · 2 yrs",
+            "Cairo, Egypt · Hybrid",
+            _sentences(rng, sentence_count),
+        ]))
+    education = [_entry([
+        rng.choice(SCHOOLS),
+        "Bachelor of Engineering - BE, Computer Engineering",
+        "2012 - 2017",
+        "Grade: Excellent",
+    ])]
+    skills = [_entry([topic.title()]) for topic in TOPICS]
+
+    return (
+        '<main class="scaffold-layout__main" aria-label="Main content" id="main">'
+        + top_card + about
+        + _section("content_collections", "Activity", activities)
+        + _section("experience", "Experience", experiences)
+        + _section("education", "Education", education)
+        + _section("skills", "Skills", skills)
+        + "</main>"
+    )
+
+
+def corpus(sizes=("small", "medium", "large"), per_size=3):
+    """Return a list of (name, html) pairs covering the given page sizes."""
+    return [
+        (f"{size}-{seed}", profile_html(size, seed))
+        for size in sizes
+        for seed in range(per_size)
+    ]
+
+
+def saved_pages():
+    """Return a list of (name, html, expected) for the saved pages, where expected holds 'profile' and 'fast_path'."""
+    pages = []
+    for filename in sorted(os.listdir(PAGES_DIR)):
+        name, extension = os.path.splitext(filename)
+        if extension != ".html":
+            continue
+        with open(os.path.join(PAGES_DIR, filename), encoding="utf-8") as file:
+            html = file.read()
+        with open(os.path.join(PAGES_DIR, name + ".json"), encoding="utf-8") as file:
+            expected = json.load(file)
+        pages.append((name, html, expected))
+    return pages
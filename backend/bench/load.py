@@ -0,0 +1,315 @@
+"""
+Offline load and latency benchmark of the backend.
+
+Starts the FastAPI app from main.py in-process (uvicorn) against the local fake
+LLM (fake_llm.py), then drives /parse_profile and /generate at the given
+concurrency with synthetic profile pages of every fixture size. /generate is
+called with Accept: text/event-stream, so the stage events give its per-stage
+breakdown: parse_target (until 'target_parsed'), strategize (until
+'brief_ready'), first_token and write (until 'done'). /parse_profile stages come
+from its Server-Timing header.
+
+Requests are spread over --keys API keys (by default one per client worker),
+so the executor's per-key cap (CREW_MAX_PER_KEY, set with --max-per-key) does
+not turn the run into a measure of that cap; both are recorded in the report.
+
+While each endpoint is driven, a separate client polls /health every
+--probe-interval-ms; its latency shows whether the event loop stays responsive
+while the crew executor is saturated.
+
+The report gives, per endpoint, the throughput and the p50/p95/p99 latency of
+the whole request and of each stage, the /health latency under that load, plus
+the fake LLM's call and token counts.
+It is printed as JSON and can be written to a file; passing a previous report as
+--baseline exits with status 1 when throughput or p95 latency (of the endpoint
+or of /health) regressed by more than --tolerance. Usage:
+
+    python load.py --requests 30 --concurrency 8 --latency-ms 300 --output load.json
+    python load.py --requests 30 --concurrency 8 --baseline load.json
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from compare_modes import percentile
+from fake_llm import start_fake_llm
+from fixtures import SIZES, profile_html
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+USER_DATA = {
+    "name": "Bench User",
+    "headline": "Software Engineer at Globex",
+    "experiences": [{"title": "Software Engineer", "company": "Globex", "duration": "2021 - Present"}],
+    "strengths": ["Python", "Distributed systems"],
+}
+# /health answers in about a millisecond, so its p95 may also grow by this much before it counts as a regression
+HEALTH_SLACK_MS = 20
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(port):
+    """Serve main.app on a background thread and wait until it accepts requests."""
+    import uvicorn
+
+    sys.path.insert(0, APP_DIR)
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def page_for(index, warm):
+    """Cycle through the fixture sizes; cold runs use a new page per request so the caches never hit."""
+    sizes = list(SIZES)
+    seed = index // len(sizes) % 3 if warm else index
+    return profile_html(sizes[index % len(sizes)], seed)
+
+
+def api_key(index, keys):
+    """Requests start in index order, so the ones running at the same time get different keys."""
+    return f"bench-key-{index % keys}"
+
+
+def post(port, path, body, headers, key="bench-key"):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+    connection.request("POST", path, body=json.dumps(body), headers={
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {key}",
+        **headers,
+    })
+    return connection, connection.getresponse()
+
+
+def parse_server_timing(header):
+    """Stage durations from a 'stage;dur=12.3, ...' Server-Timing header."""
+    stages = {}
+    for metric in filter(None, (part.strip() for part in header.split(","))):
+        name, _, duration = metric.partition(";dur=")
+        if duration:
+            stages[name] = stages.get(name, 0.0) + float(duration)
+    return stages
+
+
+def call_parse_profile(port, index, warm, keys):
+    started = time.perf_counter()
+    connection, response = post(port, "/parse_profile", {"html_content": page_for(index, warm)}, {}, api_key(index, keys))
+    response.read()
+    connection.close()
+    return {
+        "status": response.status,
+        "total_ms": (time.perf_counter() - started) * 1000,
+        "stages": parse_server_timing(response.getheader("Server-Timing") or ""),
+    }
+
+
+def call_generate(port, index, warm, keys):
+    started = time.perf_counter()
+    body = {
+        "user_data": USER_DATA,
+        "target_html": page_for(index, warm),
+        "tone": "friendly",
+        "length": "short",
+        "call_to_action": "a 15-minute call",
+    }
+    connection, response = post(port, "/generate", body, {"Accept": "text/event-stream"}, api_key(index, keys))
+    if response.status != 200:
+        response.read()
+        connection.close()
+        return {"status": response.status, "total_ms": (time.perf_counter() - started) * 1000, "stages": {}}
+
+    # Time at which each event was first seen, relative to the start of the request
+    seen = {}
+    event = None
+    for line in response:
+        line = line.decode("utf-8").rstrip("\r\n")
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+            seen.setdefault(event, (time.perf_counter() - started) * 1000)
+    connection.close()
+    total_ms = (time.perf_counter() - started) * 1000
+    if "done" not in seen:
+        return {"status": 500, "total_ms": total_ms, "stages": {}}
+
+    stages = {}
+    previous = 0.0
+    for stage, marker in [("parse_target", "target_parsed"), ("strategize", "brief_ready"), ("write", "done")]:
+        if marker in seen:
+            stages[stage] = seen[marker] - previous
+            previous = seen[marker]
+    if "token" in seen and "brief_ready" in seen:
+        stages["first_token"] = seen["token"] - seen["brief_ready"]
+    return {"status": 200, "total_ms": total_ms, "stages": stages}
+
+
+def probe_health(port, interval, stop):
+    """GET /health every `interval` seconds until `stop` is set; return the latencies and the failed probes."""
+    latencies, failed = [], 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            connection.request("GET", "/health")
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+            if response.status == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                failed += 1
+        except OSError:
+            failed += 1
+        stop.wait(interval)
+    return latencies, failed
+
+
+def latency_summary(values):
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values, 0.50), 1),
+        "p95": round(percentile(values, 0.95), 1),
+        "p99": round(percentile(values, 0.99), 1),
+    }
+
+
+def run_endpoint(call, port, requests, concurrency, warm, keys, probe_interval):
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as prober:
+        probes = prober.submit(probe_health, port, probe_interval, stop)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda index: call(port, index, warm, keys), range(requests)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        health_latencies, health_failed = probes.result()
+
+    succeeded = [result for result in results if result["status"] == 200]
+    stage_names = sorted({stage for result in succeeded for stage in result["stages"]})
+    return {
+        "requests": requests,
+        "succeeded": len(succeeded),
+        "rejected": sum(result["status"] == 429 for result in results),
+        "failed": sum(result["status"] not in (200, 429) for result in results),
+        "throughput_rps": round(len(succeeded) / elapsed, 3),
+        "latency_ms": latency_summary([result["total_ms"] for result in succeeded]),
+        "stages_ms": {
+            stage: latency_summary([result["stages"][stage] for result in succeeded if stage in result["stages"]])
+            for stage in stage_names
+        },
+        "health": {
+            "probes": len(health_latencies) + health_failed,
+            "failed": health_failed,
+            "latency_ms": latency_summary(health_latencies),
+        },
+    }
+
+
+def regressions(report, baseline, tolerance):
+    """
+    List the endpoints whose throughput dropped or p95 latency grew by more than
+    `tolerance`, or under which /health got slower or failed.
+    """
+    found = []
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous or not previous.get("latency_ms") or not current.get("latency_ms"):
+            continue
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            found.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+        if current["latency_ms"]["p95"] > previous["latency_ms"]["p95"] * (1 + tolerance):
+            found.append(f"{name}: p95 latency {previous['latency_ms']['p95']} -> {current['latency_ms']['p95']} ms")
+        health, previous_health = current.get("health", {}), previous.get("health", {})
+        if health.get("failed"):
+            found.append(f"{name}: {health['failed']} /health probes failed")
+        if health.get("latency_ms") and previous_health.get("latency_ms"):
+            limit = previous_health["latency_ms"]["p95"] * (1 + tolerance) + HEALTH_SLACK_MS
+            if health["latency_ms"]["p95"] > limit:
+                found.append(
+                    f"{name}: /health p95 latency {previous_health['latency_ms']['p95']} -> {health['latency_ms']['p95']} ms"
+                )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=30, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--keys", type=int, help="Distinct API keys to spread the requests over (default: --concurrency)")
+    parser.add_argument("--max-per-key", type=int, help="CREW_MAX_PER_KEY of the app (default: its own setting)")
+    parser.add_argument("--endpoints", default="parse_profile,generate")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Fixed latency of every fake LLM call")
+    parser.add_argument("--ms-per-1k-prompt-tokens", type=float, default=50)
+    parser.add_argument("--probe-interval-ms", type=float, default=100, help="Time between /health probes")
+    parser.add_argument("--warm", action="store_true", help="Reuse a few pages so the caches hit")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+    keys = args.keys or args.concurrency
+
+    llm_server, base_url, stats = start_fake_llm(0, args.latency_ms, args.ms_per_1k_prompt_tokens)
+    os.environ["LLM_MODEL"] = "openai/fake-model"
+    os.environ["LLM_BASE_URL"] = base_url
+    # Results must not come from a cache file left by a previous run
+    os.environ["CACHE_PATH"] = ""
+    if args.max_per_key:
+        os.environ["CREW_MAX_PER_KEY"] = str(args.max_per_key)
+    port = free_port()
+    app_server = start_app(port)
+    import config
+
+    calls = {"parse_profile": call_parse_profile, "generate": call_generate}
+    report = {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "keys": keys,
+            "max_workers": config.CREW_MAX_WORKERS,
+            "max_per_key": config.CREW_MAX_PER_KEY,
+            "latency_ms": args.latency_ms,
+            "ms_per_1k_prompt_tokens": args.ms_per_1k_prompt_tokens,
+            "warm": args.warm,
+            "probe_interval_ms": args.probe_interval_ms,
+        },
+        "endpoints": {},
+    }
+    for name in args.endpoints.split(","):
+        stats.reset()
+        report["endpoints"][name] = run_endpoint(
+            calls[name], port, args.requests, args.concurrency, args.warm, keys, args.probe_interval_ms / 1000
+        )
+        report["endpoints"][name]["llm"] = stats.snapshot()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    app_server.should_exit = True
+    llm_server.shutdown()
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            found = regressions(report, json.load(file), args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
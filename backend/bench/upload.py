@@ -0,0 +1,113 @@
+"""
+Upload cost of a repeat /generate for the same target page.
+
+Starts the app from main.py against the local fake LLM (fake_llm.py), uploads
+every fixture size once so the caches are warm, then repeats /generate for the
+same page three ways, as the extension would on a regeneration:
+
+    plain  the full page as uncompressed JSON (the previous protocol)
+    gzip   the full page, gzip-compressed
+    hash   only the page's SHA-256 in target_hash, gzip-compressed
+
+For each size and way the report gives the request body bytes on the wire and the
+server-side overhead: the request latency minus the stage timings of its
+Server-Timing header, i.e. decompression, JSON parsing, the page reduction and
+the cache lookups. Usage:
+
+    python upload.py --repeats 10 --output upload.json
+"""
+import argparse
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import statistics
+import time
+
+from fake_llm import start_fake_llm
+from fixtures import SIZES, profile_html
+from load import USER_DATA, free_port, parse_server_timing, start_app
+
+
+def request_body(html, way):
+    body = {
+        "user_data": USER_DATA,
+        "tone": "friendly",
+        "length": "short",
+        "call_to_action": "a 15-minute call",
+    }
+    if way == "hash":
+        body["target_hash"] = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    else:
+        body["target_html"] = html
+    data = json.dumps(body).encode("utf-8")
+    if way == "plain":
+        return data, {}
+    return gzip.compress(data), {"Content-Encoding": "gzip"}
+
+
+def call(port, data, headers):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+    started = time.perf_counter()
+    connection.request("POST", "/generate", body=data, headers={
+        "Content-Type": "application/json",
+        "Authorization": "Bearer bench-key",
+        **headers,
+    })
+    response = connection.getresponse()
+    response.read()
+    total_ms = (time.perf_counter() - started) * 1000
+    connection.close()
+    stages_ms = sum(parse_server_timing(response.getheader("Server-Timing") or "").values())
+    return response.status, total_ms - stages_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=10, help="Repeat requests per size and way")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    args = parser.parse_args()
+
+    llm_server, base_url, _ = start_fake_llm(0, 0, 0)
+    os.environ["LLM_MODEL"] = "openai/fake-model"
+    os.environ["LLM_BASE_URL"] = base_url
+    os.environ["CACHE_PATH"] = ""
+    port = free_port()
+    app_server = start_app(port)
+
+    report = {"config": {"repeats": args.repeats}, "sizes": {}}
+    for size in SIZES:
+        html = profile_html(size, seed=7)
+        # The first upload parses the target and builds the brief; the repeats only run the writer
+        status, _ = call(port, *request_body(html, "plain"))
+        assert status == 200, f"warm-up request failed with {status}"
+        report["sizes"][size] = {}
+        for way in ("plain", "gzip", "hash"):
+            data, headers = request_body(html, way)
+            overheads = []
+            for _ in range(args.repeats):
+                status, overhead_ms = call(port, data, headers)
+                assert status == 200, f"{way} request failed with {status}"
+                overheads.append(overhead_ms)
+            report["sizes"][size][way] = {
+                "request_bytes": len(data),
+                "overhead_ms_p50": round(statistics.median(overheads), 2),
+            }
+        plain, hashed = report["sizes"][size]["plain"], report["sizes"][size]["hash"]
+        report["sizes"][size]["hash_vs_plain"] = {
+            "bytes": round(plain["request_bytes"] / hashed["request_bytes"], 1),
+            "overhead": round(plain["overhead_ms_p50"] / max(hashed["overhead_ms_p50"], 0.01), 1),
+        }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    app_server.should_exit = True
+    llm_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
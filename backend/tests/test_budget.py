@@ -0,0 +1,117 @@
+"""
+The prompt token budgeter on oversized profiles.
+
+The target profiles are built from the fixture pages, inflated with extra
+activities and roles, and seeded with the inputs the strongest connection
+vectors would build on: a recent post buried deep in the activity list, an old
+role at the user's company (a shared experience) and an old post about the
+user's skills (a value proposition). For every stage and message length the
+budget must hold and the seeded inputs must survive it.
+"""
+import json
+
+import pytest
+
+import config
+from budget import budget_pair, estimate_tokens
+from extractor import extract_profile
+from fixtures import profile_html
+from reducer import reduce_profile_html
+
+FILLER = (
+    "Great to see the community growing. Thanks to everyone who joined the meetup last week, "
+    "the discussion on scaling data teams was lively and the slides are now online. "
+)
+
+USER = {
+    "name": "Bench User",
+    "headline": "Platform Engineer at Globex | Kubernetes, Rust, observability",
+    "about": "I build developer platforms. Lately I have been writing Kubernetes operators in Rust.",
+    "experiences": [
+        {"title": "Platform Engineer", "company": "Globex", "employment_type": None,
+         "duration": "Mar 2021 - Present", "description": "Kubernetes operators and observability in Rust."},
+    ],
+    "education": [{"institution": "Alexandria University", "degree": "BSc", "field_of_study": "Computer Science"}],
+    "activities": [],
+    "interests": "Developer platforms, Kubernetes operators, Rust, observability.",
+    "strengths": ["Kubernetes", "Rust", "Observability", "Platform engineering"],
+    "other": None,
+}
+
+# The seeded inputs of the top connection vectors: (kind, index, marker in the kept text)
+SEEDED = {
+    "timely_hook": ("activity", 60, "just shipped"),
+    "shared_experience": ("experience", 25, "globex"),
+    "value_proposition": ("activity", 150, "kubernetes operator"),
+}
+
+
+def oversized_target(size, activities, experiences):
+    profile = extract_profile(reduce_profile_html(profile_html(size, seed=3))).profile
+    base_activities = profile["activities"]
+    profile["activities"] = [
+        {**base_activities[index % len(base_activities)], "posted_ago": f"{index // 4 + 1}mo",
+         "content": FILLER * 6}
+        for index in range(activities)
+    ]
+    base_experiences = profile["experiences"]
+    profile["experiences"] = [
+        {**base_experiences[index % len(base_experiences)], "duration": f"Jan {2020 - index} - Dec {2020 - index}",
+         "description": FILLER * 5}
+        for index in range(experiences)
+    ]
+    profile["activities"][SEEDED["timely_hook"][1]].update(
+        posted_ago="2d", content="We just shipped the new inference gateway to every region, thanks to the team!"
+    )
+    profile["experiences"][SEEDED["shared_experience"][1]].update(
+        company="Globex", description="Built the first internal developer platform at Globex."
+    )
+    profile["activities"][SEEDED["value_proposition"][1]].update(
+        content="Looking for someone who has written a Kubernetes operator in Rust for our observability stack."
+    )
+    return profile
+
+
+def seeded_kept(target):
+    kept = {}
+    for name, (kind, index, marker) in SEEDED.items():
+        if kind == "experience":
+            entry = target["experiences"][index] if index < len(target["experiences"]) else {}
+            kept[name] = marker in json.dumps(entry).lower()
+        else:
+            kept[name] = any(marker in (activity.get("content") or "").lower() for activity in target["activities"])
+    return kept
+
+
+
+# Every stage whose prompt carries both profiles, at every message length
+BUDGETS = [("connection_analysis", None)] + [("fast", length) for length in config.LENGTH_BUDGET_FACTORS]
+
+
+@pytest.fixture(scope="module")
+def targets():
+    return {
+        "large": oversized_target("large", 200, 40),
+        "medium": oversized_target("medium", 160, 30),
+    }
+
+
+@pytest.mark.parametrize("size", ["large", "medium"])
+@pytest.mark.parametrize("stage, length", BUDGETS)
+def test_budget_holds_and_keeps_the_seeded_inputs(targets, size, stage, length):
+    target = targets[size]
+    budget = int(config.PROMPT_TOKEN_BUDGETS[stage] * config.LENGTH_BUDGET_FACTORS.get(length, 1.0))
+    assert estimate_tokens(USER) + estimate_tokens(target) > budget
+    user, trimmed = budget_pair(USER, target, budget)
+    assert estimate_tokens(user) + estimate_tokens(trimmed) <= budget
+    assert seeded_kept(trimmed) == {name: True for name in SEEDED}
+    # The user profile is small enough to be kept whole
+    assert user == USER
+
+
+def test_raw_text_profile_is_cut_to_the_budget():
+    # A profile whose page could not be extracted goes into fast mode as raw text
+    raw = {"profile_text": FILLER * 2000}
+    budget = config.PROMPT_TOKEN_BUDGETS["fast"]
+    _, trimmed = budget_pair(USER, raw, budget)
+    assert estimate_tokens(USER) + estimate_tokens(trimmed) <= budget
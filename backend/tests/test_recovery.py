@@ -0,0 +1,83 @@
+"""The JSON recovery layer over a corpus of malformed model outputs."""
+import json
+
+import pytest
+
+from fake_llm import BRIEF, INSIGHTS, PROFILE
+from models import EngagementBrief, LinkedInProfile, ProfileInsights
+from recovery import recover_json, validate_fields
+
+PROFILE_JSON = json.dumps(PROFILE)
+BRIEF_JSON = json.dumps(BRIEF)
+BRIEF_PRETTY = json.dumps(BRIEF, indent=2)
+
+# (name, model, raw output, fields that must be recovered, fields left for the follow-up)
+CASES = [
+    ("clean profile", LinkedInProfile, PROFILE_JSON, ["name", "experiences", "strengths"], []),
+    ("json code fence", LinkedInProfile, f"```json\n{PROFILE_JSON}\n```", ["name", "activities"], []),
+    ("reasoning before the answer", EngagementBrief,
+     f"Thought: I now can give a great answer\nFinal Answer: {BRIEF_JSON}", ["connection_vectors"], []),
+    ("brace in the reasoning", EngagementBrief,
+     "Thought: the schema is {seniority_dynamic, connection_vectors}.\nFinal Answer: " + BRIEF_JSON,
+     ["seniority_dynamic", "connection_vectors"], []),
+    ("trailing text with braces", EngagementBrief,
+     BRIEF_JSON + "\nLet me know if you need anything else {happy to help}.", ["connection_vectors"], []),
+    ("trailing commas", ProfileInsights,
+     '{"interests": "LLM inference.", "strengths": ["Python", "MLOps",],}', ["interests", "strengths"], []),
+    ("braces inside strings", ProfileInsights,
+     '{"interests": "Writes {templated} prompts }", "strengths": ["C{++}"]}', ["interests", "strengths"], []),
+    ("escaped quotes", ProfileInsights,
+     '{"interests": "Calls it \\"boring\\" infra", "strengths": ["Go"]}', ["interests", "strengths"], []),
+    ("truncated inside the last string", LinkedInProfile,
+     PROFILE_JSON[:PROFILE_JSON.index('"strengths"') + 30], ["name", "experiences", "interests"], ["strengths"]),
+    ("truncated inside an optional field", LinkedInProfile,
+     PROFILE_JSON[:PROFILE_JSON.index('"about"') + 20], ["name", "headline"], ["about", "interests", "strengths"]),
+    ("truncated inside a list entry", EngagementBrief,
+     BRIEF_PRETTY[:BRIEF_PRETTY.index("Shared Experience")], ["seniority_dynamic"], ["connection_vectors"]),
+    ("truncated after a key", ProfileInsights, '{"interests": "LLM inference.", "strengths":',
+     ["interests"], ["strengths"]),
+    ("truncated inside a number", EngagementBrief,
+     '{"seniority_dynamic": "Peer to Peer", "connection_vectors": [{"rank": 1', ["seniority_dynamic"], ["connection_vectors"]),
+    ("missing optional fields", LinkedInProfile,
+     json.dumps({key: value for key, value in PROFILE.items() if key not in ("headline", "about", "other")}),
+     ["name", "headline", "about"], []),
+    ("missing entry fields", LinkedInProfile,
+     json.dumps({**PROFILE, "experiences": [{"title": "Engineer", "company": "Acme"}]}), ["experiences"], []),
+    ("missing required fields", LinkedInProfile,
+     json.dumps({key: value for key, value in PROFILE.items() if key not in ("interests", "strengths")}),
+     ["name", "experiences"], ["interests", "strengths"]),
+    ("invalid field type", EngagementBrief,
+     json.dumps({**BRIEF, "connection_vectors": [{**BRIEF["connection_vectors"][0], "rank": "first"}]}),
+     ["seniority_dynamic"], ["connection_vectors"]),
+    ("insights in a fence with trailing notes", ProfileInsights,
+     f"```\n{json.dumps(INSIGHTS)}\n```\nNotes: none.", ["interests", "strengths"], []),
+    ("no object at all", EngagementBrief,
+     "I could not find enough information in the profiles to build a brief.", [],
+     ["connection_vectors", "seniority_dynamic"]),
+]
+
+
+
+def followup_fields(model, raw):
+    """The recovered fields and the fields left for the targeted follow-up, as recover_output sees them."""
+    try:
+        data, lost = recover_json(raw)
+    except ValueError:
+        # As in recover_output: with no object at all, every field is left for the follow-up
+        return {}, sorted(model.model_fields)
+    data, invalid = validate_fields(data, model)
+    return data, sorted(set(invalid) | set(lost))
+
+
+@pytest.mark.parametrize("name, model, raw, recovered, followup", CASES, ids=[case[0] for case in CASES])
+def test_recovery(name, model, raw, recovered, followup):
+    data, invalid = followup_fields(model, raw)
+    assert [key for key in recovered if key not in data] == []
+    assert invalid == sorted(followup)
+
+
+def test_recovered_values_are_kept():
+    raw = PROFILE_JSON[:PROFILE_JSON.index('"strengths"') + 30]
+    data, _ = followup_fields(LinkedInProfile, raw)
+    assert data["name"] == PROFILE["name"]
+    assert data["experiences"] == LinkedInProfile.model_validate(PROFILE).model_dump()["experiences"]
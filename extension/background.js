@@ -19,27 +19,152 @@ chrome.runtime.onInstalled.addListener(() => {
   } catch {}
 });
 
-async function sendToBackend(profile) {
-  const apiKey = await getApiKey();
+// Rewrites a message from the brief of an earlier generation; returns null if the brief has expired
+async function rewriteWithBrief(profile, apiKey) {
+  const res = await fetch(`${SERVER_URL}/rewrite`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Authorization': `Bearer ${apiKey}`
+    },
+    body: JSON.stringify({
+      brief_id: profile.brief_id,
+      tone: profile.tone,
+      length: profile.length,
+      call_to_action: profile.call_to_action,
+      extra_instruction: profile.extra_instruction
+    })
+  });
+
+  if (res.status === 404) {
+    return null;
+  }
+  if (!res.ok) {
+    const txt = await res.text();
+    throw new Error(`Backend error: ${res.status} ${txt}`);
+  }
+  return res.json();
+}
 
-  // Use the configured server URL
-  const endpoint = `${SERVER_URL}/generate`; 
+// Serializes a request body as JSON, gzip-compressed when the browser supports it
+async function jsonRequestBody(payload) {
+  const json = JSON.stringify(payload);
+  if (typeof CompressionStream === 'undefined') {
+    return { body: json, headers: { 'Content-Type': 'application/json' } };
+  }
+  const stream = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+  return {
+    body: await new Response(stream).arrayBuffer(),
+    headers: { 'Content-Type': 'application/json', 'Content-Encoding': 'gzip' }
+  };
+}
 
-  const res = await fetch(endpoint, {
+// SHA-256 hex digest of the UTF-8 text; the server keeps uploaded pages under this key
+async function sha256Hex(text) {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+}
+
+async function postGenerate(payload, apiKey) {
+  const { body, headers } = await jsonRequestBody(payload);
+  return fetch(`${SERVER_URL}/generate`, {
     method: 'POST',
     headers: {
-      'Content-Type': 'application/json',
+      ...headers,
+      'Accept': 'text/event-stream',
       'Authorization': `Bearer ${apiKey}`
     },
-    body: JSON.stringify(profile)
+    body
   });
+}
+
+async function sendToBackend(profile) {
+  const apiKey = await getApiKey();
+
+  if (profile.brief_id) {
+    const rewritten = await rewriteWithBrief(profile, apiKey);
+    if (rewritten) {
+      return rewritten;
+    }
+  }
+
+  let res;
+  if (profile.target_html) {
+    // Hash first: the page is only uploaded when the server does not have it yet (404)
+    const targetHash = await sha256Hex(profile.target_html);
+    const { target_html, ...rest } = profile;
+    res = await postGenerate({ ...rest, target_hash: targetHash }, apiKey);
+    if (res.status === 404) {
+      res = await postGenerate({ ...profile, target_hash: targetHash }, apiKey);
+    }
+  } else {
+    res = await postGenerate(profile, apiKey);
+  }
 
   if (!res.ok) {
     const txt = await res.text();
     throw new Error(`Backend error: ${res.status} ${txt}`);
   }
-  const result = await res.json();
-  return result;
+  if (!res.headers.get('Content-Type')?.startsWith('text/event-stream')) {
+    return res.json();
+  }
+  return readEventStream(res);
+}
+
+// Starts parsing the target on the server while the user fills in the form; best effort.
+// The page is referenced by hash first, like in sendToBackend, and the server dedupes repeats.
+async function prefetchTarget(htmlContent) {
+  const apiKey = await getApiKey();
+  if (!apiKey || !htmlContent) {
+    return null;
+  }
+  const targetHash = await sha256Hex(htmlContent);
+  const post = async (payload) => {
+    const { body, headers } = await jsonRequestBody(payload);
+    return fetch(`${SERVER_URL}/prefetch`, {
+      method: 'POST',
+      headers: {
+        ...headers,
+        'Authorization': `Bearer ${apiKey}`
+      },
+      body
+    });
+  };
+  let res = await post({ target_hash: targetHash });
+  if (res.status === 404) {
+    res = await post({ target_html: htmlContent });
+  }
+  return res.ok ? res.json() : null;
+}
+
+// Reads the /generate event stream, relays stage progress and message tokens to the popup,
+// and resolves with the final result
+async function readEventStream(res) {
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += value;
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = /^event: (.*)$/m.exec(raw)?.[1];
+      const data = JSON.parse(/^data: (.*)$/m.exec(raw)?.[1] || 'null');
+      if (event === 'done') {
+        return data;
+      }
+      if (event === 'error') {
+        throw new Error(`Backend error: ${data?.detail}`);
+      }
+      // The popup may have been closed; progress is best effort
+      chrome.runtime.sendMessage({ type: 'GENERATE_PROGRESS', event, data }).catch(() => {});
+    }
+  }
+  throw new Error('Backend closed the stream before the message was ready');
 }
 
 // Function to call the parse_profile endpoint specifically for prefill
@@ -51,16 +176,17 @@ async function parseProfileWithAI(htmlContent) {
   }
 
   try {
+    const { body, headers } = await jsonRequestBody({
+      html_content: htmlContent,
+      timestamp: new Date().toISOString()
+    });
     const response = await fetch(`${SERVER_URL}/parse_profile`, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json',
+        ...headers,
         'Authorization': `Bearer ${apiKey}`
       },
-      body: JSON.stringify({
-        html_content: htmlContent,
-        timestamp: new Date().toISOString()
-      })
+      body
     });
 
     if (!response.ok) {
@@ -68,6 +194,9 @@ async function parseProfileWithAI(htmlContent) {
       if (response.status === 503) {
         return { ok: false, error: '503', message: 'The model is overloaded. Please try again later.' };
       }
+      if (response.status === 429) {
+        return { ok: false, error: '429', message: 'The server is busy. Please try again shortly.' };
+      }
       throw new Error(`HTTP ${response.status}: ${response.statusText}`);
     }
 
@@ -126,14 +255,17 @@ chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
   if (message?.type === 'GENERATE_MESSAGE') {
     const payload = message.payload;
     
-    // The payload now contains: user_data, target_html, tone, length, call_to_action, extra_instruction
+    // The payload now contains: user_data, target_html, tone, length, call_to_action, extra_instruction,
+    // brief_id and prefetch_job_id
     const backendPayload = {
       user_data: payload.user_data,
       target_html: payload.target_html,
       tone: payload.tone,
       length: payload.length,
       call_to_action: payload.call_to_action,
-      extra_instruction: payload.extra_instruction
+      extra_instruction: payload.extra_instruction,
+      brief_id: payload.brief_id,
+      prefetch_job_id: payload.prefetch_job_id
     };
     
     
@@ -165,6 +297,16 @@ chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
     return true;
   }
   
+  if (message?.type === 'PREFETCH_TARGET') {
+    prefetchTarget(message.html).then((job) => {
+      sendResponse({ ok: Boolean(job), result: job });
+    }).catch((err) => {
+      console.warn('Target prefetch failed:', err);
+      sendResponse({ ok: false, error: err.message });
+    });
+    return true;
+  }
+
   if (message?.type === 'OPEN_OPTIONS') {
     chrome.runtime.openOptionsPage();
     sendResponse?.({ ok: true });
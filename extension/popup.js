@@ -2,14 +2,40 @@
 
 let currentMessage = '';
 let currentTarget = null;
+let currentBriefId = null;
+let prefetchJobId = null;
+let streamedMessage = '';
 let messageTextarea = null;
 
 // Initialize popup
 document.addEventListener('DOMContentLoaded', () => {
   setupEventListeners();
   loadGeneratedMessage();
+  prefetchCurrentTarget();
 });
 
+// Opening the popup on a profile starts parsing the target on the server, so the slowest
+// step is underway while the user picks the tone, length and CTA. The job id goes into the
+// Generate payload, so the server reuses the job even if the page is captured differently then
+async function prefetchCurrentTarget() {
+  try {
+    const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+    if (!tab?.url || !/^https:\/\/www\.linkedin\.com\/in\//.test(tab.url)) {
+      return;
+    }
+    const response = await chrome.tabs.sendMessage(tab.id, { type: 'GET_PROFILE_HTML' });
+    if (response?.ok && response?.htmlContent) {
+      chrome.runtime.sendMessage({ type: 'PREFETCH_TARGET', html: response.htmlContent }, (resp) => {
+        if (!chrome.runtime.lastError && resp?.ok) {
+          prefetchJobId = resp.result?.job_id || null;
+        }
+      });
+    }
+  } catch {
+    // Best effort: Generate still parses the target itself
+  }
+}
+
 function setupEventListeners() {
   // Close button
   document.getElementById('closeBtn').addEventListener('click', () => {
@@ -132,7 +158,8 @@ function setupEventListeners() {
             tone: tone,
             length: length,
             call_to_action: cta,
-            extra_instruction: extra
+            extra_instruction: extra,
+            prefetch_job_id: prefetchJobId
           };
           
           // Send the generate message request (avoid logging payload contents in production)
@@ -153,6 +180,7 @@ function setupEventListeners() {
             }
             if (resp.ok) {
               currentTarget = payload;
+              currentBriefId = resp.result?.brief_id || null;
               const gm = resp.result?.generated_message || resp.result?.message || 'Generated message';
               displayMessage(gm);
             } else {
@@ -169,7 +197,32 @@ function setupEventListeners() {
     });
   }
 
-  // No background broadcast listeners needed; responses handled via callbacks
+  // Stage progress and message tokens streamed by the background script while generating
+  chrome.runtime.onMessage.addListener((message) => {
+    if (message?.type !== 'GENERATE_PROGRESS') {
+      return;
+    }
+    if (message.event === 'target_parsed') {
+      const name = message.data?.name;
+      showLoading(name ? `Finding connection points with ${escapeHtml(name)}...` : 'Finding connection points...');
+    } else if (message.event === 'brief_ready') {
+      streamedMessage = '';
+      showLoading('Writing your message...');
+    } else if (message.event === 'token') {
+      streamedMessage += message.data?.text || '';
+      showPartialMessage(streamedMessage);
+    }
+  });
+}
+
+function showPartialMessage(text) {
+  let partial = document.getElementById('partialMessage');
+  if (!partial) {
+    const content = document.getElementById('content');
+    content.innerHTML = '<div id="partialMessage" class="message-editable" style="white-space:pre-wrap;"></div>';
+    partial = document.getElementById('partialMessage');
+  }
+  partial.textContent = text;
 }
 
 async function loadGeneratedMessage() {
@@ -296,7 +349,10 @@ async function regenerateMessage() {
       tone: tone,
       length: length,
       call_to_action: cta,
-      extra_instruction: extra
+      extra_instruction: extra,
+      prefetch_job_id: currentTarget.prefetch_job_id,
+      // Lets the backend rewrite from the cached brief instead of re-running the whole crew
+      brief_id: currentBriefId
     };
     
     // Request regeneration from background script using GENERATE_MESSAGE
@@ -316,6 +372,7 @@ async function regenerateMessage() {
       if (resp.ok) {
         // Update currentTarget with the new payload for future regenerations
         currentTarget = updatedPayload;
+        currentBriefId = resp.result?.brief_id || currentBriefId;
         const gm = resp.result?.generated_message || resp.result?.message || 'Generated message';
         displayMessage(gm);
       } else {
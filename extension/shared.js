@@ -106,6 +106,8 @@ function getProfileParseErrorMessage(errorType) {
       return 'Please configure your API key in Settings tab first';
     case '503':
       return 'The model is overloaded. Please try again later.';
+    case '429':
+      return 'The server is busy. Please try again shortly.';
     case 'network-error':
       return 'Could not connect to AI service - check if backend is running';
     case 'backend-error':